@@ -0,0 +1,83 @@
+import hashlib
+import struct
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL.shaders import compileShader, compileProgram
+
+# shaders/<name>.bin layout: magic, driver binary format, sha256 of sources + driver, then the binary
+_HEADER = struct.Struct('<4sI32s')
+_MAGIC = b'PGB1'
+
+
+def get_shaders(shader_program_name):
+    with open(f'shaders/{shader_program_name}.vert') as file:
+        vertex_shader = file.read()
+    with open(f'shaders/{shader_program_name}.frag') as file:
+        fragment_shader = file.read()
+
+    return vertex_shader, fragment_shader
+
+
+def _cache_key(vertex_src, fragment_src):
+    # a binary is only valid for the exact sources and the driver that produced it
+    key = hashlib.sha256()
+    for part in (vertex_src.encode(), fragment_src.encode(),
+                 glGetString(GL_VENDOR), glGetString(GL_RENDERER), glGetString(GL_VERSION)):
+        key.update(part or b'')
+        key.update(b'\0')
+    return key.digest()
+
+
+def _load_binary(path, key):
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError:
+        return 0
+    if len(data) <= _HEADER.size:
+        return 0
+    magic, binary_format, stored_key = _HEADER.unpack_from(data)
+    if magic != _MAGIC or stored_key != key:
+        return 0
+    binary = np.frombuffer(data, dtype=np.uint8, offset=_HEADER.size)
+    program = glCreateProgram()
+    glProgramBinary(program, binary_format, binary.ctypes.data, binary.size)
+    # drivers reject binaries they no longer understand by failing the link
+    if glGetProgramiv(program, GL_LINK_STATUS) == GL_FALSE:
+        glDeleteProgram(program)
+        return 0
+    return program
+
+
+def _save_binary(path, key, program):
+    size = int(glGetProgramiv(program, GL_PROGRAM_BINARY_LENGTH))
+    if size <= 0:
+        return
+    binary = np.empty(size, dtype=np.uint8)
+    length = np.zeros(1, dtype=np.int32)
+    binary_format = np.zeros(1, dtype=np.uint32)
+    glGetProgramBinary(program, size, length, binary_format, binary.ctypes.data)
+    try:
+        with open(path, 'wb') as file:
+            file.write(_HEADER.pack(_MAGIC, int(binary_format[0]), key))
+            file.write(binary[:length[0]].tobytes())
+    except OSError:
+        pass
+
+
+def load_program(shader_program_name):
+    """Link shaders/<name>.vert/.frag, reusing the driver binary cached by a previous run when it still matches."""
+    vertex_src, fragment_src = get_shaders(shader_program_name)
+    if not bool(glProgramBinary):
+        # no GL 4.1 / ARB_get_program_binary: always compile from source
+        return compileProgram(compileShader(vertex_src, GL_VERTEX_SHADER), compileShader(fragment_src, GL_FRAGMENT_SHADER))
+
+    path = f'shaders/{shader_program_name}.bin'
+    key = _cache_key(vertex_src, fragment_src)
+    program = _load_binary(path, key)
+    if program:
+        return program
+
+    program = compileProgram(compileShader(vertex_src, GL_VERTEX_SHADER), compileShader(fragment_src, GL_FRAGMENT_SHADER))
+    _save_binary(path, key, program)
+    return program
@@ -3,8 +3,8 @@
 # Requires: glfw, PyOpenGL, Pillow
 import glfw
 from OpenGL.GL import *
+import ctypes
 import numpy as np
-from math import sin, cos
 from PIL import Image, ImageDraw, ImageFont
 
 # Simple shader program for colored triangles (modern OpenGL)
@@ -33,6 +33,51 @@ void main() {
 }
 """
 
+# Flat-colored 2D quads for buttons: a shared unit quad, placed and
+# colored per instance (rect = cx, cy, w, h in NDC)
+VERT_BUTTON_SRC = """
+#version 330 core
+layout(location = 0) in vec2 position;
+layout(location = 1) in vec4 rect;
+layout(location = 2) in vec4 color;
+out vec4 v_color;
+void main() {
+    gl_Position = vec4(position * rect.zw + rect.xy, 0.0, 1.0);
+    v_color = color;
+}
+"""
+FRAG_BUTTON_SRC = """
+#version 330 core
+in vec4 v_color;
+out vec4 FragColor;
+void main() {
+    FragColor = v_color;
+}
+"""
+
+# Textured 2D quads for text labels (NDC positions + uv)
+VERT_TEXT_SRC = """
+#version 330 core
+layout(location = 0) in vec2 position;
+layout(location = 1) in vec2 uv;
+out vec2 v_uv;
+void main() {
+    gl_Position = vec4(position, 0.0, 1.0);
+    v_uv = uv;
+}
+"""
+FRAG_TEXT_SRC = """
+#version 330 core
+in vec2 v_uv;
+uniform sampler2D u_tex;
+out vec4 FragColor;
+void main() {
+    FragColor = texture(u_tex, v_uv);
+}
+"""
+
+BUTTON_COLOR = (0.2, 0.7, 0.2, 0.8)
+
 # Helper to compile shader
 def compile_shader(src, sh_type):
     sh = glCreateShader(sh_type)
@@ -43,54 +88,158 @@ def compile_shader(src, sh_type):
         print(glGetShaderInfoLog(sh))
     return sh, bool(status)
 
+# Helper to compile + link a vertex/fragment pair
+def create_program(vert_src, frag_src):
+    vs, ok_vs = compile_shader(vert_src, GL_VERTEX_SHADER)
+    fs, ok_fs = compile_shader(frag_src, GL_FRAGMENT_SHADER)
+    prog = glCreateProgram()
+    glAttachShader(prog, vs)
+    glAttachShader(prog, fs)
+    glLinkProgram(prog)
+    linked = glGetProgramiv(prog, GL_LINK_STATUS)
+    glDeleteShader(vs)
+    glDeleteShader(fs)
+    return prog, bool(linked)
+
 # Button class for fallback UI
 class Button:
     def __init__(self, x, y, w, h, label):
         self.x, self.y, self.w, self.h = x, y, w, h  # NDC coords
         self.label = label
+        # bounding box edges, fixed for the button's lifetime
+        self.l, self.r = x - w/2, x + w/2
+        self.b, self.t = y - h/2, y + h/2
 
     def contains(self, nx, ny):
-        return (self.x - self.w/2 <= nx <= self.x + self.w/2 and
-                self.y - self.h/2 <= ny <= self.y + self.h/2)
+        return self.l <= nx <= self.r and self.b <= ny <= self.t
+
+# Hit testing over a whole button set at once: bounds is an (N, 4) array of
+# (l, r, b, t) rows, one per button
+def button_bounds(buttons):
+    return np.array([[b.l, b.r, b.b, b.t] for b in buttons], dtype=np.float32)
+
+def hit_index(bounds, nx, ny):
+    mask = (bounds[:,0]<=nx) & (nx<=bounds[:,1]) & (bounds[:,2]<=ny) & (ny<=bounds[:,3])
+    return int(np.argmax(mask)) if mask.any() else -1
 
 # Text rendering using Pillow to texture
 class TextRenderer:
+    ATLAS_SIZE = 512
+    MAX_GLYPHS = 64  # initial VBO capacity, grown on demand
+
     def __init__(self):
         self.font = ImageFont.load_default()
-        self.cache = {}
-
-    def create_texture(self, text, color=(255,255,255)):
-        if text in self.cache:
-            return self.cache[text]
-        img = Image.new("RGBA", (256, 64), (0,0,0,0))
-        draw = ImageDraw.Draw(img)
-        draw.text((0,0), text, font=self.font, fill=color+(255,))
+        self.program, _ = create_program(VERT_TEXT_SRC, FRAG_TEXT_SRC)
+        glUseProgram(self.program)
+        glUniform1i(glGetUniformLocation(self.program, "u_tex"), 0)
+        glUseProgram(0)
+        self._current_tex = 0
+        self.glyphs = {}  # char -> (u0, v0, u1, v1, w, h) in atlas uv / pixels
+        self.tex = self._build_atlas()
+        # glyph quads: 6 verts * (pos.xy, uv.xy) interleaved, reused per label
+        self._verts = np.zeros((self.MAX_GLYPHS * 6, 4), dtype=np.float32)
+        self.vao = glGenVertexArrays(1)
+        self.vbo = glGenBuffers(1)
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self._verts.nbytes, None, GL_STREAM_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, False, 16, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 2, GL_FLOAT, False, 16, ctypes.c_void_p(8))
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+
+    def _build_atlas(self):
+        # allocate the atlas storage once, then fill it glyph by glyph with
+        # glTexSubImage2D; glyphs missing at draw time are added the same way
+        size = self.ATLAS_SIZE
+        chars = [chr(i) for i in range(32, 127)]
+        # every cell shares the line height so glyphs line up on the baseline
+        self._line_h = max(self.font.getbbox(ch)[3] for ch in chars)
+        self._pack_x = self._pack_y = self._shelf_h = 0
         tex = glGenTextures(1)
         glBindTexture(GL_TEXTURE_2D, tex)
+        self._current_tex = tex
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, img.width, img.height, 0,
-                     GL_RGBA, GL_UNSIGNED_BYTE, img.tobytes())
-        self.cache[text] = (tex, img.width, img.height)
-        return tex, img.width, img.height
+        if bool(glTexStorage2D):
+            glTexStorage2D(GL_TEXTURE_2D, 1, GL_RGBA8, size, size)
+        else:
+            # pre-4.2 drivers: mutable storage, still allocated only once
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA8, size, size, 0,
+                         GL_RGBA, GL_UNSIGNED_BYTE, bytes(size * size * 4))
+        self.tex = tex
+        for ch in chars:
+            self._add_glyph(ch)
+        return tex
+
+    def _add_glyph(self, ch, color=(255,255,255)):
+        # shelf packer: place the glyph cell, rasterize it alone and upload
+        # only its (x, y, w, h) subregion of the atlas
+        size = self.ATLAS_SIZE
+        h = self._line_h
+        w = max(1, int(round(self.font.getlength(ch))), self.font.getbbox(ch)[2])
+        if self._pack_x + w > size:
+            self._pack_x = 0; self._pack_y += self._shelf_h; self._shelf_h = 0
+        if self._pack_y + h > size:
+            # atlas full: remember the fallback so we don't retry every frame
+            self.glyphs[ch] = self.glyphs.get(" ")
+            return self.glyphs[ch]
+        x, y = self._pack_x, self._pack_y
+        img = Image.new("RGBA", (w, h), (0,0,0,0))
+        ImageDraw.Draw(img).text((0,0), ch, font=self.font, fill=color+(255,))
+        if self._current_tex != self.tex:
+            glBindTexture(GL_TEXTURE_2D, self.tex)
+            self._current_tex = self.tex
+        glTexSubImage2D(GL_TEXTURE_2D, 0, x, y, w, h, GL_RGBA, GL_UNSIGNED_BYTE, img.tobytes())
+        glyph = (x/size, y/size, (x+w)/size, (y+h)/size, w, h)
+        self.glyphs[ch] = glyph
+        self._pack_x += w + 1
+        self._shelf_h = max(self._shelf_h, h + 1)
+        return glyph
 
     def draw_text(self, text, x, y, scale=1.0):
-        tex, w, h = self.create_texture(text)
-        glEnable(GL_TEXTURE_2D)
-        glBindTexture(GL_TEXTURE_2D, tex)
-        glBegin(GL_QUADS)
-        glTexCoord2f(0,0); glVertex2f(x, y)
-        glTexCoord2f(1,0); glVertex2f(x + w/300*scale, y)
-        glTexCoord2f(1,1); glVertex2f(x + w/300*scale, y + h/300*scale)
-        glTexCoord2f(0,1); glVertex2f(x, y + h/300*scale)
-        glEnd()
-        glDisable(GL_TEXTURE_2D)
+        if len(text) > len(self._verts) // 6:
+            self._verts = np.zeros((len(text) * 6, 4), dtype=np.float32)
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            glBufferData(GL_ARRAY_BUFFER, self._verts.nbytes, None, GL_STREAM_DRAW)
+        verts = self._verts
+        space = self.glyphs[" "]
+        n = 0
+        for ch in text:
+            u0, v0, u1, v1, w, h = self.glyphs.get(ch) or self._add_glyph(ch) or space
+            x1 = x + w/300*scale
+            y1 = y + h/300*scale
+            # image rows run top-down, so v0 maps to the top edge
+            verts[n:n+6] = ((x, y, u0, v1), (x1, y, u1, v1), (x1, y1, u1, v0),
+                            (x, y, u0, v1), (x1, y1, u1, v0), (x, y1, u0, v0))
+            n += 6
+            x = x1
+        if n == 0:
+            return
+        glUseProgram(self.program)
+        if self.tex != self._current_tex:
+            glBindTexture(GL_TEXTURE_2D, self.tex)
+            self._current_tex = self.tex
+        glBindVertexArray(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, n * 16, verts)
+        glDrawArrays(GL_TRIANGLES, 0, n)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+        glUseProgram(0)
 
 # Main UI class
 class GameFullUI:
     def __init__(self, width=1280, height=720, title="Demo UI"):
         if not glfw.init():
             raise RuntimeError("glfw.init failed")
+        # 3.3 core, forward-compatible: no fixed-function fallbacks
+        glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
+        glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
+        glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+        glfw.window_hint(glfw.OPENGL_FORWARD_COMPAT, True)
         self.width = width
         self.height = height
         self._win = glfw.create_window(width, height, title, None, None)
@@ -101,33 +250,29 @@ class GameFullUI:
         glfw.make_context_current(self._win)
         glfw.swap_interval(1)
         glClearColor(0.06, 0.08, 0.10, 1.0)
-        glEnable(GL_DEPTH_TEST)
-
-        # Compile shader
-        vs, ok_vs = compile_shader(VERT_SHADER_SRC, GL_VERTEX_SHADER)
-        fs, ok_fs = compile_shader(FRAG_SHADER_SRC, GL_FRAGMENT_SHADER)
-        self.program = glCreateProgram()
-        glAttachShader(self.program, vs)
-        glAttachShader(self.program, fs)
-        glLinkProgram(self.program)
-        self.linked = glGetProgramiv(self.program, GL_LINK_STATUS)
-        glDeleteShader(vs)
-        glDeleteShader(fs)
+
+        # Compile shaders
+        self.program, self.linked = create_program(VERT_SHADER_SRC, FRAG_SHADER_SRC)
+        self.loc_scale = glGetUniformLocation(self.program, "scale")
+        self.loc_time = glGetUniformLocation(self.program, "time")
+        self.button_program, _ = create_program(VERT_BUTTON_SRC, FRAG_BUTTON_SRC)
 
         # Triangle data
         self.vertices = np.array([-0.5,-0.5,0, 0.5,-0.5,0, 0,0.5,0], dtype=np.float32)
         self.colors = np.array([1,0,0, 0,1,0, 0,0,1], dtype=np.float32)
+        # interleaved x,y,z,r,g,b per vertex in a single VBO
+        data = np.empty((3,6), dtype=np.float32)
+        data[:,:3] = self.vertices.reshape(3,3)
+        data[:,3:] = self.colors.reshape(3,3)
         self.vao = glGenVertexArrays(1)
-        self.vbo = glGenBuffers(2)
+        self.vbo = glGenBuffers(1)
         glBindVertexArray(self.vao)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo[0])
-        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
         glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, False, 0, None)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo[1])
-        glBufferData(GL_ARRAY_BUFFER, self.colors.nbytes, self.colors, GL_STATIC_DRAW)
+        glVertexAttribPointer(0, 3, GL_FLOAT, False, 24, None)
         glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1,3,GL_FLOAT,False,0,None)
+        glVertexAttribPointer(1, 3, GL_FLOAT, False, 24, ctypes.c_void_p(12))
         glBindVertexArray(0)
 
         # State
@@ -136,8 +281,11 @@ class GameFullUI:
         self.show_options = False
         self.tri_scale = 1.0
         self.tri_speed = 1.0
+        self._last_scale = None  # last value sent to the scale uniform
         self.counter = 0
         self.pause_menu_open = False
+        self._dirty = True  # input arrived; redraw without waiting
+        self.on_quit = None  # optional hook, e.g. to cancel scheduled timers
 
         # Buttons
         self.home_buttons = [
@@ -150,6 +298,42 @@ class GameFullUI:
             Button(0, -0.1, 1.0, 0.25, "Options"),
             Button(0, -0.3, 1.0, 0.25, "Main Menu"),
         ]
+        self._home_actions = {
+            "Start": self.start_game,
+            "Options": self.open_options,
+            "Quit": self.quit_game,
+        }
+        self._pause_actions = {
+            "Resume": self.resume_from_pause,
+            "Options": self.open_options,
+            "Main Menu": self.goto_menu,
+        }
+        self.home_bounds = button_bounds(self.home_buttons)
+        self.pause_bounds = button_bounds(self.pause_buttons)
+        # Button quads: one VAO with a static unit quad and a per-instance
+        # (rect, color) VBO sized for the largest button set, refilled only
+        # when the set being drawn changes
+        unit_quad = np.array([-0.5,-0.5, 0.5,-0.5, 0.5,0.5,
+                              -0.5,-0.5, 0.5,0.5, -0.5,0.5], dtype=np.float32)
+        max_buttons = max(len(self.home_buttons), len(self.pause_buttons))
+        self.button_vao = glGenVertexArrays(1)
+        self.button_vbo = glGenBuffers(2)
+        glBindVertexArray(self.button_vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.button_vbo[0])
+        glBufferData(GL_ARRAY_BUFFER, unit_quad.nbytes, unit_quad, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, False, 0, None)
+        glBindBuffer(GL_ARRAY_BUFFER, self.button_vbo[1])
+        glBufferData(GL_ARRAY_BUFFER, max_buttons * 8 * 4, None, GL_DYNAMIC_DRAW)
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 4, GL_FLOAT, False, 32, ctypes.c_void_p(0))
+        glVertexAttribDivisor(1, 1)
+        glEnableVertexAttribArray(2)
+        glVertexAttribPointer(2, 4, GL_FLOAT, False, 32, ctypes.c_void_p(16))
+        glVertexAttribDivisor(2, 1)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindVertexArray(0)
+        self._button_layout = None  # button list currently uploaded
         self.text = TextRenderer()
         glfw.set_mouse_button_callback(self._win, self._on_mouse)
         glfw.set_key_callback(self._win, self._on_key)
@@ -163,11 +347,22 @@ class GameFullUI:
         self.paused = False
         self.pause_menu_open = False
 
+    def open_options(self):
+        self.show_options = True
+
+    def goto_menu(self):
+        self.scene = "menu"
+        self.paused = False
+        self.pause_menu_open = False
+
     def quit_game(self):
+        if self.on_quit:
+            self.on_quit()
         glfw.set_window_should_close(self._win, True)
 
     def _on_key(self, win, key, sc, act, mods):
         if act != glfw.PRESS: return
+        self._dirty = True
         if key == glfw.KEY_ESCAPE:
             if self.scene=="playing" and self.paused:
                 self.resume_from_pause()
@@ -188,55 +383,70 @@ class GameFullUI:
 
     def _on_mouse(self, win, button, action, mods):
         if button!=glfw.MOUSE_BUTTON_LEFT or action!=glfw.PRESS: return
+        self._dirty = True
         mx,my = glfw.get_cursor_pos(self._win)
         nx = (mx/self.width)*2 -1
         ny = -((my/self.height)*2 -1)
         if self.scene=="menu":
-            for b in self.home_buttons:
-                if b.contains(nx, ny):
-                    if b.label=="Start": self.start_game()
-                    elif b.label=="Options": self.show_options=True
-                    elif b.label=="Quit": self.quit_game()
+            idx = hit_index(self.home_bounds, nx, ny)
+            if idx < 0: return
+            cb = self._home_actions.get(self.home_buttons[idx].label)
+            cb and cb()
         elif self.scene=="playing" and self.pause_menu_open:
-            for b in self.pause_buttons:
-                if b.contains(nx, ny):
-                    if b.label=="Resume": self.resume_from_pause()
-                    elif b.label=="Options": self.show_options=True
-                    elif b.label=="Main Menu": self.scene="menu"; self.paused=False; self.pause_menu_open=False
+            idx = hit_index(self.pause_bounds, nx, ny)
+            if idx < 0: return
+            cb = self._pause_actions.get(self.pause_buttons[idx].label)
+            cb and cb()
 
     def draw_triangle(self, time_sec):
+        # all time-varying motion (sin/cos offset + pulse) lives in VERT_SHADER_SRC;
+        # the CPU only forwards the clock and the slider values
         glUseProgram(self.program)
         glBindVertexArray(self.vao)
-        loc_scale = glGetUniformLocation(self.program,"scale")
-        loc_time = glGetUniformLocation(self.program,"time")
-        glUniform1f(loc_scale,self.tri_scale)
-        glUniform1f(loc_time,time_sec*self.tri_speed)
+        if self._last_scale != self.tri_scale:
+            glUniform1f(self.loc_scale,self.tri_scale)
+            self._last_scale = self.tri_scale
+        glUniform1f(self.loc_time,time_sec*self.tri_speed)
         glDrawArrays(GL_TRIANGLES,0,3)
         glBindVertexArray(0)
         glUseProgram(0)
 
+    def _upload_buttons(self, buttons):
+        # one instance per button: rect (cx, cy, w, h) | color (rgba)
+        # filled column-wise in NumPy; the GPU expands each rect into its quad
+        inst = np.empty((len(buttons), 8), dtype=np.float32)
+        inst[:, :4] = [(b.x, b.y, b.w, b.h) for b in buttons]
+        inst[:, 4:] = BUTTON_COLOR
+        glBindBuffer(GL_ARRAY_BUFFER, self.button_vbo[1])
+        glBufferSubData(GL_ARRAY_BUFFER, 0, inst.nbytes, inst)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._button_layout = buttons
+
     def _draw_buttons(self, buttons):
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix(); glLoadIdentity()
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix(); glLoadIdentity()
-        glDisable(GL_DEPTH_TEST)
+        if buttons is not self._button_layout:
+            self._upload_buttons(buttons)
+        # all button quads in one instanced draw
+        glUseProgram(self.button_program)
+        glBindVertexArray(self.button_vao)
+        glDrawArraysInstanced(GL_TRIANGLES, 0, 6, len(buttons))
+        glBindVertexArray(0)
+        glUseProgram(0)
+        # draw labels
         for b in buttons:
-            glColor4f(0.2,0.7,0.2,0.8)
-            glBegin(GL_TRIANGLES)
-            l,r,t,bm = b.x-b.w/2,b.x+b.w/2,b.y+b.h/2,b.y-b.h/2
-            glVertex2f(l,bm); glVertex2f(r,bm); glVertex2f(r,t)
-            glVertex2f(l,bm); glVertex2f(r,t); glVertex2f(l,t)
-            glEnd()
-            # draw label
-            self.text.draw_text(b.label, l+0.05, bm+0.05, 1.0)
-        glEnable(GL_DEPTH_TEST)
-        glPopMatrix(); glMatrixMode(GL_PROJECTION); glPopMatrix(); glMatrixMode(GL_MODELVIEW)
+            self.text.draw_text(b.label, b.l+0.05, b.b+0.05, 1.0)
 
     def run(self):
         while not glfw.window_should_close(self._win):
-            glfw.poll_events()
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            # menus are static: block until input (or ~30 Hz) instead of spinning at vsync
+            static = self.scene=="menu" or (self.paused and self.pause_menu_open)
+            # take the flag before handling events: callbacks fired below set it
+            # again, so the iteration after any input polls instead of waiting
+            dirty, self._dirty = self._dirty, False
+            if static and not dirty:
+                glfw.wait_events_timeout(1/30)
+            else:
+                glfw.poll_events()
+            glClear(GL_COLOR_BUFFER_BIT)
             t = glfw.get_time()
             if self.scene in ("menu","playing"):
                 self.draw_triangle(t)
@@ -245,6 +455,9 @@ class GameFullUI:
             if self.scene=="playing" and self.paused and self.pause_menu_open:
                 self._draw_buttons(self.pause_buttons)
             glfw.swap_buffers(self._win)
+            # wait for the swap to land so the driver can't queue frames
+            # ahead of input; next iteration polls fresh events
+            glFinish()
         glfw.terminate()
 
 if __name__=="__main__":
@@ -12,6 +12,12 @@ from OpenGL.GL import *
 import ctypes
 import numpy as np
 
+_HAVE_PIL = True
+try:
+    from PIL import Image, ImageFont, ImageDraw
+except Exception:
+    _HAVE_PIL = False
+
 # --- helpers ---
 def compile_shader(src, kind):
     sh = glCreateShader(kind)
@@ -38,16 +44,23 @@ def link_program(vs, fs):
 VERT = """
 #version 330 core
 layout(location=0) in vec2 a_pos;
+layout(location=1) in vec4 i_rect;  // per-instance cx, cy, w, h
+layout(location=2) in vec4 i_color; // per-instance rgba
 uniform mat4 u_proj;
-void main(){ gl_Position = u_proj * vec4(a_pos,0,1); }
+out vec4 v_color;
+void main(){
+    v_color = i_color;
+    gl_Position = u_proj * vec4(a_pos*i_rect.zw + i_rect.xy,0,1);
+}
 """
 FRAG = """
 #version 330 core
-uniform vec4 u_color;
+in vec4 v_color;
 out vec4 o_col;
-void main(){ o_col = u_color; }
+void main(){ o_col = v_color; }
 """
 
+# glGetError stalls the command stream: call at init/teardown only, never per frame
 def print_gl_error(stage=""):
     err = glGetError()
     if err != GL_NO_ERROR:
@@ -84,45 +97,59 @@ if not (ok_vs and ok_fs and ok_prog):
     print("Shader build failed — see logs above. Exiting.")
     glfw.terminate(); sys.exit(1)
 print_gl_error("after shader build")
-
-# make a VAO/VBO for a rectangle (we'll upload per-rect)
+# uniform locations never change after link
+loc = glGetUniformLocation(prog, "u_proj")
+
+# make a VAO/VBO for a unit quad (scaled/offset per instance by i_rect)
+unit_quad = np.array([
+    -0.5, -0.5,
+     0.5, -0.5,
+     0.5,  0.5,
+    -0.5, -0.5,
+     0.5,  0.5,
+    -0.5,  0.5,
+], dtype=np.float32)
 vao = glGenVertexArrays(1)
 vbo = glGenBuffers(1)
 glBindVertexArray(vao)
 glBindBuffer(GL_ARRAY_BUFFER, vbo)
-# allocate space (6 verts * 2 floats)
-glBufferData(GL_ARRAY_BUFFER, 6 * 2 * ctypes.sizeof(ctypes.c_float), None, GL_DYNAMIC_DRAW)
+glBufferData(GL_ARRAY_BUFFER, unit_quad.nbytes, unit_quad, GL_STATIC_DRAW)
 glEnableVertexAttribArray(0)
 glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 2 * ctypes.sizeof(ctypes.c_float), ctypes.c_void_p(0))
+# second VBO: one (rect, color) row per rect, advanced once per instance
+inst_vbo = glGenBuffers(1)
+glBindBuffer(GL_ARRAY_BUFFER, inst_vbo)
+inst_stride = 8 * ctypes.sizeof(ctypes.c_float)
+glEnableVertexAttribArray(1)
+glVertexAttribPointer(1, 4, GL_FLOAT, GL_FALSE, inst_stride, ctypes.c_void_p(0))
+glVertexAttribDivisor(1, 1)
+glEnableVertexAttribArray(2)
+glVertexAttribPointer(2, 4, GL_FLOAT, GL_FALSE, inst_stride, ctypes.c_void_p(4 * ctypes.sizeof(ctypes.c_float)))
+glVertexAttribDivisor(2, 1)
 glBindBuffer(GL_ARRAY_BUFFER, 0)
 glBindVertexArray(0)
 print_gl_error("vao/vbo create")
 
 # simple orthographic projection (identity since we feed clip coords)
 proj = np.eye(4, dtype=np.float32)
+# proj never changes: upload it once
+glUseProgram(prog)
+glUniformMatrix4fv(loc, 1, GL_FALSE, proj)
+glUseProgram(0)
+
+def upload_rects(rects):
+    """Upload [((cx, cy, w, h), color), ...] as instance data; returns the instance count."""
+    data = np.array([(*r, *c) for r, c in rects], dtype=np.float32)
+    glBindBuffer(GL_ARRAY_BUFFER, inst_vbo)
+    glBufferData(GL_ARRAY_BUFFER, data.nbytes, data, GL_STATIC_DRAW)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    return len(data)
 
-def draw_rect(cx, cy, w, h, color):
-    left = cx - w/2; right = cx + w/2; top = cy + h/2; bottom = cy - h/2
-    verts = np.array([
-        left, bottom,
-        right, bottom,
-        right, top,
-        left, bottom,
-        right, top,
-        left, top,
-    ], dtype=np.float32)
+def draw_rects(count):
+    # every rect of the screen in one instanced draw
     glUseProgram(prog)
-    # upload
     glBindVertexArray(vao)
-    glBindBuffer(GL_ARRAY_BUFFER, vbo)
-    glBufferSubData(GL_ARRAY_BUFFER, 0, verts.nbytes, verts)
-    # uniforms
-    loc = glGetUniformLocation(prog, "u_proj")
-    glUniformMatrix4fv(loc, 1, GL_FALSE, proj)
-    locc = glGetUniformLocation(prog, "u_color")
-    glUniform4f(locc, *color)
-    glDrawArrays(GL_TRIANGLES, 0, 6)
-    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    glDrawArraysInstanced(GL_TRIANGLES, 0, 6, count)
     glBindVertexArray(0)
     glUseProgram(0)
 
@@ -133,43 +160,40 @@ btn_start = (0.0, 0.2, 1.0, 0.28)
 btn_options = (0.0, -0.05, 1.0, 0.28)
 btn_quit = (0.0, -0.35, 1.0, 0.28)
 
-print("Pillow available:", end=" ")
-try:
-    from PIL import Image
-    print("Yes")
-except Exception:
-    print("No (text will be shown in window title instead)")
+print("Pillow available:", "Yes" if _HAVE_PIL else "No (text will be shown in window title instead)")
 
 # Force scene to home
 scene = "home"
+# the home screen is static: upload its rects once, draw them every frame
+home_count = upload_rects([
+    ((0.0, 0.0, 2.0, 2.0), (0.0,0.0,0.0,0.2)),   # dark overlay
+    (title_rect, (0.02,0.02,0.04,0.9)),
+    # Start, Options, Quit large buttons (distinct colors)
+    (btn_start, (0.15,0.7,0.2,1.0)),
+    (btn_options, (0.15,0.45,0.85,1.0)),
+    (btn_quit, (0.9,0.2,0.25,1.0)),
+])
+print_gl_error("instance upload")
 
 while not glfw.window_should_close(win):
     glfw.poll_events()
-    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+    glClear(GL_COLOR_BUFFER_BIT)
 
     if scene == "home":
         # background subtle triangle: just clear color + overlay
-        # draw dark overlay
-        draw_rect(0.0, 0.0, 2.0, 2.0, (0.0,0.0,0.0,0.2))
-        # title rect
-        draw_rect(*title_rect, (0.02,0.02,0.04,0.9))
-        # Start, Options, Quit large buttons (distinct colors)
-        draw_rect(*btn_start, (0.15,0.7,0.2,1.0))
-        draw_rect(*btn_options, (0.15,0.45,0.85,1.0))
-        draw_rect(*btn_quit, (0.9,0.2,0.25,1.0))
+        # overlay, title rect and buttons, in upload order
+        draw_rects(home_count)
 
         # If Pillow installed you could draw text; otherwise update title so user sees labels
-        try:
-            from PIL import Image, ImageFont, ImageDraw
-            # we won't render text into GL now — keep minimal
-            pass
-        except Exception:
+        # we won't render text into GL now — keep minimal
+        if not _HAVE_PIL:
             glfw.set_window_title(win, "Home - Start / Options / Quit")
 
     glfw.swap_buffers(win)
 
+print_gl_error("after render loop")
 print("Shutting down")
-glDeleteBuffers(1, [vbo])
+glDeleteBuffers(2, [vbo, inst_vbo])
 glDeleteVertexArrays(1, [vao])
 glDeleteProgram(prog)
 glfw.terminate()
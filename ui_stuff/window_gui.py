@@ -10,13 +10,14 @@ Full-featured modern OpenGL UI:
 
 Requirements:
     pip install glfw PyOpenGL Pillow numpy
+    pip install numba  # optional: compiled text layout
 """
 import glfw
 import time
 import math
 import ctypes
 import numpy as np
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Tuple, Dict, List, Optional
 
 # Try Pillow for atlas creation
@@ -26,25 +27,66 @@ try:
 except Exception:
     USE_PIL = False
 
+# numba is optional; text layout falls back to vectorized numpy without it
+USE_NUMBA = True
+try:
+    from numba import njit
+except Exception:
+    USE_NUMBA = False
+
 from OpenGL.GL import *
 
+# float size and attribute offset pointers (VPTR[k] = k floats in), built once
+SZ_F = ctypes.sizeof(ctypes.c_float)
+VPTR = [ctypes.c_void_p(i * SZ_F) for i in range(16)]
+
+# layers fainter than one 8-bit step contribute nothing to the framebuffer
+MIN_ALPHA = 1.0 / 255
+
+# ---------- GL state cache ----------
+# last program / VAO / unit-0 texture bound through the helpers below, so
+# redundant binds are skipped; nothing here ever rebinds 0 between draws
+_bound = {"prog": 0, "vao": 0, "tex": 0}
+
+def reset_gl_state():
+    # call once a new context is current
+    _bound.update(prog=0, vao=0, tex=0)
+
+def use_program(prog):
+    if _bound["prog"] != prog:
+        glUseProgram(prog); _bound["prog"] = prog
+
+def bind_vertex_array(vao):
+    if _bound["vao"] != vao:
+        glBindVertexArray(vao); _bound["vao"] = vao
+
+def bind_texture(tex):
+    if _bound["tex"] != tex:
+        glBindTexture(GL_TEXTURE_2D, tex); _bound["tex"] = tex
+
 # ---------- Utility: easing ----------
 def lerp(a, b, t): return a + (b - a) * t
 def clamp(x, a, b): return max(a, min(b, x))
 def smoothstep(x): return x * x * (3 - 2 * x)
-def ease_out_cubic(x): return 1 - pow(1 - x, 3)
+def ease_out_cubic(x): y = 1.0 - x; return 1.0 - y*y*y
 
 # ---------- Shaders ----------
 VERT_TRI = """
 #version 330 core
 layout(location=0) in vec3 a_pos;
 layout(location=1) in vec3 a_col;
-uniform mat4 u_model;
-uniform mat4 u_vp;
+uniform float u_time;  // seconds since start (small, so float precision holds)
+uniform float u_scale;
 out vec3 v_col;
 void main() {
     v_col = a_col;
-    gl_Position = u_vp * u_model * vec4(a_pos, 1.0);
+    // model = translate(sin t * 0.45, cos t * 0.25) * rotate(sin t * 45deg) * scale(s), drawn in NDC
+    float st = sin(u_time);
+    float s = abs(st) * 0.5 * u_scale + 0.3;
+    float ang = st * radians(45.0);
+    float c = cos(ang), sa = sin(ang);
+    vec2 p = mat2(c, -sa, sa, c) * (a_pos.xy * s) + vec2(st * 0.45, cos(u_time) * 0.25);
+    gl_Position = vec4(p, a_pos.z, 1.0);
 }
 """
 FRAG_TRI = """
@@ -56,34 +98,37 @@ void main(){ o_color = vec4(v_col, 1.0); }
 
 VERT_UI = """
 #version 330 core
-layout(location=0) in vec2 a_pos;
-layout(location=1) in vec2 a_uv;
-layout(location=2) in float a_alpha; // per-vertex alpha for smooth fade
+layout(location=0) in vec2 a_quad;    // unit quad corner, shared by every instance
+layout(location=1) in vec2 i_pos;     // per-instance bottom-left
+layout(location=2) in vec2 i_size;
+layout(location=3) in vec2 i_uv0;
+layout(location=4) in vec2 i_uv_size;
+layout(location=5) in vec4 i_color;   // per-instance tint, fade alpha premultiplied into .a
 out vec2 v_uv;
-out float v_alpha;
+out vec4 v_color;
 uniform mat4 u_proj;
 void main(){
-    v_uv = a_uv;
-    v_alpha = a_alpha;
-    gl_Position = u_proj * vec4(a_pos, 0.0, 1.0);
+    v_uv = i_uv0 + a_quad * i_uv_size;
+    v_color = i_color;
+    gl_Position = u_proj * vec4(i_pos + a_quad * i_size, 0.0, 1.0);
 }
 """
 FRAG_UI = """
 #version 330 core
 in vec2 v_uv;
-in float v_alpha;
+in vec4 v_color;
 uniform sampler2D u_tex;
-uniform vec4 u_color;
 out vec4 o_color;
 void main(){
     vec4 t = texture(u_tex, v_uv);
-    // multiply color * texture alpha and per-vertex alpha
-    vec4 col = vec4(u_color.rgb, u_color.a * t.a * v_alpha);
+    // multiply color * texture alpha (color.a already carries the fade alpha)
+    vec4 col = vec4(v_color.rgb, v_color.a * t.a);
     o_color = col * t;
 }
 """
 
-def compile_program(vs_src: bytes, fs_src: bytes) -> int:
+def compile_program(vs_src: bytes, fs_src: bytes) -> Tuple[int, Dict[str, int]]:
+    """Compile + link; returns (program, {uniform name: location}) for every active uniform."""
     vs = glCreateShader(GL_VERTEX_SHADER)
     glShaderSource(vs, vs_src)
     glCompileShader(vs)
@@ -104,17 +149,32 @@ def compile_program(vs_src: bytes, fs_src: bytes) -> int:
         raise RuntimeError(glGetProgramInfoLog(prog))
 
     glDeleteShader(vs); glDeleteShader(fs)
-    return prog
+    # resolve uniform locations once, at link time
+    uniforms = {}
+    for i in range(glGetProgramiv(prog, GL_ACTIVE_UNIFORMS)):
+        name = glGetActiveUniform(prog, i)[0]
+        if isinstance(name, bytes):
+            name = name.decode()
+        name = name.split("[")[0]
+        uniforms[name] = glGetUniformLocation(prog, name)
+    return prog, uniforms
 
 # ---------- Glyph atlas and text rendering ----------
 class GlyphAtlas:
+    WHITE_SIZE = 4  # opaque white block reserved at (0,0) for untextured quads
+    MISSING = 256   # metrics table slot for codepoints without a glyph
+
     def __init__(self, font_path: Optional[str] = None, font_size: int = 24, padding: int = 2, chars: str = None):
         self.font_size = font_size
         self.padding = padding
         self.chars = chars if chars is not None else ''.join(chr(i) for i in range(32,127))
-        self.glyphs = {}  # char -> (x,y,w,h,advance,ox,oy)
+        # codepoint -> (x,y,w,h) in atlas pixels; rows with h == 0 have no glyph
+        self.metrics = np.zeros((self.MISSING + 1, 4), dtype=np.int32)
         self.tex = 0
         self.tex_w = 0; self.tex_h = 0
+        self.white_uv = (0.5, 0.5)
+        self.image = None  # CPU-side copy of the atlas
+        self._dirty_rects: List[Tuple[int, int, int, int]] = []  # (x,y,w,h) not yet on the GPU
         if USE_PIL:
             try:
                 if font_path:
@@ -138,8 +198,8 @@ class GlyphAtlas:
     def _build_atlas(self):
         # measure glyph sizes
         glyph_images = []
-        total_w = 0
-        max_h = 0
+        total_area = 0
+        max_w = 0
         # gather bitmaps
         for ch in self.chars:
             # measure
@@ -148,20 +208,24 @@ class GlyphAtlas:
             # If width/height zero, render a single pixel to avoid zero width
             if w == 0: w = self.font_size // 4
             if h == 0: h = self.font_size // 2
-            # create image and draw char onto it with alpha
-            img = Image.new("RGBA", (w + self.padding*2, h + self.padding*2), (0,0,0,0))
+            # create coverage image and draw char onto it
+            img = Image.new("L", (w + self.padding*2, h + self.padding*2), 0)
             d = ImageDraw.Draw(img)
-            d.text((self.padding, self.padding), ch, font=self.font, fill=(255,255,255,255))
+            d.text((self.padding, self.padding), ch, font=self.font, fill=255)
             glyph_images.append((ch, img))
-            total_w += img.width
-            max_h = max(max_h, img.height)
+            total_area += img.width * img.height
+            max_w = max(max_w, img.width)
 
-        # pack into rows: simple packing into one row until width > limit, then new row
-        # choose width limit as min(total_w, 2048)
-        max_tex_w = min(total_w, 2048)
-        x = 0; y = 0; row_h = 0
+        # shelf packing: tallest glyphs first so each row wastes little height,
+        # rows as wide as a roughly square atlas (power of two, at most 2048)
+        # the white block starts the first row
+        ws = self.WHITE_SIZE
+        glyph_images.sort(key=lambda g: -g[1].height)
+        side = int(math.ceil(math.sqrt(total_area + ws * ws)))
+        atlas_w = 1 << max(side - 1, max_w + ws - 1, 1).bit_length()
+        atlas_w = min(atlas_w, 2048)
+        x = ws; y = 0; row_h = ws
         placements = []
-        atlas_w = max_tex_w
         atlas_h = 0
         for ch, img in glyph_images:
             w, h = img.size
@@ -176,104 +240,287 @@ class GlyphAtlas:
             row_h = max(row_h, h)
         atlas_h += row_h
         # pad to power-of-two optionally (not required)
-        # create atlas image
-        atlas = Image.new("RGBA", (atlas_w, atlas_h), (0,0,0,0))
+        # create atlas image: single channel, coverage is all the shader needs
+        atlas = Image.new("L", (atlas_w, atlas_h), 0)
+        atlas.paste(255, (0, 0, ws, ws))
+        self._dirty_rects.append((0, 0, ws, ws))
         for ch, px, py, img in placements:
-            atlas.paste(img, (px, py), img)
-            self.glyphs[ch] = (px, py, img.width, img.height)
-        # upload atlas to GL texture
-        atlas_data = atlas.tobytes("raw", "RGBA")
+            atlas.paste(img, (px, py))
+            if ord(ch) < self.MISSING:
+                self.metrics[ord(ch)] = (px, py, img.width, img.height)
+            self._dirty_rects.append((px, py, img.width, img.height))
+        self.image = atlas
+        self._build_metrics(atlas.size)
         self.tex_w, self.tex_h = atlas.size
+        # sample the white block's center so linear filtering stays inside it
+        self.white_uv = ((ws / 2) / self.tex_w, (ws / 2) / self.tex_h)
+        # allocate the texture storage once; contents only arrive through upload()
         self.tex = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, self.tex)
-        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.tex_w, self.tex_h, 0, GL_RGBA, GL_UNSIGNED_BYTE, atlas_data)
+        bind_texture(self.tex)
+        if bool(glTexStorage2D):
+            glTexStorage2D(GL_TEXTURE_2D, 1, GL_R8, self.tex_w, self.tex_h)
+        else:
+            # pre-4.2 drivers: mutable storage, still allocated only once
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_R8, self.tex_w, self.tex_h, 0, GL_RED, GL_UNSIGNED_BYTE, None)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
         glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
-        glBindTexture(GL_TEXTURE_2D, 0)
-        print(f"GlyphAtlas: built texture {self.tex_w}x{self.tex_h} with {len(self.glyphs)} glyphs")
+        # sample as (1,1,1,coverage) so FRAG_UI reads it like the old white RGBA atlas
+        glTexParameteriv(GL_TEXTURE_2D, GL_TEXTURE_SWIZZLE_RGBA, [GL_ONE, GL_ONE, GL_ONE, GL_RED])
+        self.upload()
+        print(f"GlyphAtlas: built texture {self.tex_w}x{self.tex_h} with {int(self.present.sum())} glyphs")
+
+    def upload(self):
+        """Push only the regions rasterized since the last upload (expects self.tex bound)."""
+        if not self._dirty_rects:
+            return
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        for x, y, w, h in self._dirty_rects:
+            data = self.image.crop((x, y, x + w, y + h)).tobytes()
+            glTexSubImage2D(GL_TEXTURE_2D, 0, x, y, w, h, GL_RED, GL_UNSIGNED_BYTE, data)
+        self._dirty_rects.clear()
+
+    def _build_metrics(self, size):
+        # per-codepoint lookup tables for vectorized text layout; index
+        # MISSING (>= 256) stands for any char without a glyph
+        tex_w, tex_h = size
+        n = self.MISSING + 1
+        self.gw = np.zeros(n, dtype=np.float32); self.gh = np.zeros(n, dtype=np.float32)
+        self.uv_left = np.zeros(n, dtype=np.float32); self.uv_top = np.zeros(n, dtype=np.float32)
+        self.uv_right = np.zeros(n, dtype=np.float32); self.uv_bottom = np.zeros(n, dtype=np.float32)
+        # chars without a glyph advance by roughly one em
+        self.advance = np.full(n, self.font_size if self.font_size else 10, dtype=np.float32)
+        gx, gy, gw, gh = self.metrics.T.astype(np.float32)
+        self.present = self.metrics[:, 3] > 0
+        p = self.present
+        self.gw[p] = gw[p]; self.gh[p] = gh[p]
+        self.advance[p] = gw[p]
+        self.uv_left[p] = gx[p] / tex_w; self.uv_top[p] = gy[p] / tex_h
+        self.uv_right[p] = (gx[p] + gw[p]) / tex_w; self.uv_bottom[p] = (gy[p] + gh[p]) / tex_h
 
-    def get_glyph(self, ch):
-        return self.glyphs.get(ch, None)
+if USE_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def build_text_block(codes, present, advance, gw, gh, uv_l, uv_b, uv_r, uv_t):
+        # single pass over the string; same rows as TextRenderer._layout
+        n = 0
+        for c in codes:
+            if present[c]:
+                n += 1
+        block = np.empty((n, 8), dtype=np.float32)
+        pen = 0.0
+        i = 0
+        for c in codes:
+            if present[c]:
+                block[i, 0] = pen
+                block[i, 1] = -gh[c]
+                block[i, 2] = gw[c]
+                block[i, 3] = gh[c]
+                block[i, 4] = uv_l[c]
+                block[i, 5] = uv_b[c]
+                block[i, 6] = uv_r[c] - uv_l[c]
+                block[i, 7] = uv_t[c] - uv_b[c]
+                i += 1
+            pen += advance[c]
+        return block
 
 class TextRenderer:
     def __init__(self, atlas: GlyphAtlas):
         self.atlas = atlas
-        # dynamic VBO for text quads: pos.xy, uv.xy, alpha
-        self.vbo = glGenBuffers(1)
+        self._static = {}  # text -> laid-out block, for labels that never change
+        self.set_viewport(1, 1)
+
+    def set_viewport(self, win_w: int, win_h: int):
+        # pixel -> NDC scale, cached so drawing never queries GL_VIEWPORT
+        self._sx, self._sy = 2.0 / max(win_w, 1), 2.0 / max(win_h, 1)
+
+    def _layout(self, text: str) -> np.ndarray:
+        """Lay out text at the origin: one (x, y, w, h, u0, v0, du, dv) row per glyph, x/y/w/h in pixels (y up)."""
+        at = self.atlas
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        codes = np.minimum(codes, at.MISSING)
+        if USE_NUMBA:
+            return build_text_block(codes, at.present, at.advance, at.gw, at.gh,
+                                    at.uv_left, at.uv_bottom, at.uv_right, at.uv_top)
+        # pen position of every char: running sum of advances
+        pen_x = np.concatenate(([0.0], np.cumsum(at.advance[codes])[:-1]))
+        keep = at.present[codes]
+        codes, pen_x = codes[keep], pen_x[keep]
+        # quads hang below the pen line; uv origin is the glyph's bottom-left
+        block = np.empty((len(codes), 8), dtype=np.float32)
+        block[:, 0] = pen_x
+        block[:, 1] = -at.gh[codes]
+        block[:, 2] = at.gw[codes]
+        block[:, 3] = at.gh[codes]
+        block[:, 4] = at.uv_left[codes]
+        block[:, 5] = at.uv_bottom[codes]
+        block[:, 6] = at.uv_right[codes] - at.uv_left[codes]
+        block[:, 7] = at.uv_top[codes] - at.uv_bottom[codes]
+        return block
+
+    def build_static(self, text: str) -> np.ndarray:
+        """Layout of a label that never changes, computed once and reused by draw_static."""
+        block = self._static.get(text)
+        if block is None:
+            block = self._static[text] = self._layout(text)
+        return block
+
+    def draw_static(self, batch, block: np.ndarray, left_ndc: float, top_ndc: float, color=(1,1,1,1), alpha=1.0):
+        """Emit a block from build_static into batch with its top-left at (left_ndc, top_ndc)."""
+        n = len(block)
+        if n == 0:
+            return
+        sx, sy = self._sx, self._sy
+        # blocks longer than one batch allocation go out in capacity-sized pieces
+        for i in range(0, n, batch.capacity):
+            part = block[i:i + batch.capacity]
+            out = batch.alloc(len(part))
+            out[:, 0] = part[:, 0] * sx + left_ndc
+            out[:, 1] = part[:, 1] * sy + top_ndc
+            out[:, 2] = part[:, 2] * sx
+            out[:, 3] = part[:, 3] * sy
+            out[:, 4:8] = part[:, 4:8]
+            out[:, 8:] = color
+            out[:, 11] *= alpha
+
+    def draw_text(self, batch, text: str, left_ndc: float, top_ndc: float, color=(1,1,1,1), alpha=1.0):
+        """Emit glyph quads into batch. left_ndc, top_ndc are NDC coords where top-left of text will be."""
+        if not USE_PIL or self.atlas.tex == 0 or not text:
+            return
+        self.draw_static(batch, self._layout(text), left_ndc, top_ndc, color, alpha)
+
+# ---------- UI batching ----------
+class UIBatch:
+    """Collects every UI rect and glyph of a frame; flush() draws them in one instanced call.
+
+    Each rect/glyph is one instance of a shared unit quad, described by FLOATS
+    per-instance floats. With persistent=True (GL 4.4) the instance VBO is a
+    persistently mapped ring of RING slots: alloc() writes straight into the
+    current slot, and a fence per slot keeps the CPU from overwriting instances
+    the GPU may still be reading.
+    Otherwise instances are staged in a growable array; each flush orphans the VBO
+    with glBufferData(NULL) and copies them in with glBufferSubData.
+    With separate_format=True (GL 4.3) the layout is declared once with
+    glVertexAttribFormat; the quad uses binding point 0 and the instances binding 1.
+    """
+    # instance layout: pos.xy (2), size.xy (2), uv0 (2), uv_size (2), color.rgba (4) -- total 12 floats;
+    # the fade alpha is folded into color.a on the CPU
+    FLOATS = 12
+    RING = 3
+    # (location, components, float offset) of every per-instance attribute; location 0 is the quad corner
+    ATTRIBS = ((1, 2, 0), (2, 2, 2), (3, 2, 4), (4, 2, 6), (5, 4, 8))
+    QUAD = np.array([0,0, 1,0, 0,1, 1,1], dtype=np.float32)  # triangle strip
+
+    def __init__(self, prog: int, tex: int, capacity: int = 4096, persistent: bool = False,
+                 separate_format: bool = False):
+        self.prog, self.tex = prog, tex
+        self.count = 0
+        self.capacity = capacity  # largest single alloc(), in instances
+        self.persistent = persistent
+        f = SZ_F
+        stride = self.FLOATS * f
         self.vao = glGenVertexArrays(1)
-        glBindVertexArray(self.vao)
+        self.quad_vbo, self.vbo = glGenBuffers(2)
+        bind_vertex_array(self.vao)
+        glBindBuffer(GL_ARRAY_BUFFER, self.quad_vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.QUAD.nbytes, self.QUAD, GL_STATIC_DRAW)
+        glEnableVertexAttribArray(0)
+        if separate_format:
+            glVertexAttribFormat(0, 2, GL_FLOAT, GL_FALSE, 0)
+            glVertexAttribBinding(0, 0)
+            glBindVertexBuffer(0, self.quad_vbo, 0, 2 * f)
+        else:
+            glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, 2 * f, VPTR[0])
         glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        # reserve some initial space
-        glBufferData(GL_ARRAY_BUFFER, 1024 * ctypes.sizeof(ctypes.c_float), None, GL_DYNAMIC_DRAW)
-        # layout: pos.x,pos.y (float2) | uv.x,uv.y (float2) | alpha (float)
-        stride = (2 + 2 + 1) * ctypes.sizeof(ctypes.c_float)
-        glEnableVertexAttribArray(0)  # pos
-        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
-        glEnableVertexAttribArray(1)  # uv
-        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(2 * ctypes.sizeof(ctypes.c_float)))
-        glEnableVertexAttribArray(2)  # alpha
-        glVertexAttribPointer(2, 1, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(4 * ctypes.sizeof(ctypes.c_float)))
+        if persistent:
+            nbytes = self.RING * capacity * stride
+            flags = GL_MAP_WRITE_BIT | GL_MAP_PERSISTENT_BIT | GL_MAP_COHERENT_BIT
+            glBufferStorage(GL_ARRAY_BUFFER, nbytes, None, flags)
+            ptr = glMapBufferRange(GL_ARRAY_BUFFER, 0, nbytes, flags)
+            mem = (ctypes.c_float * (nbytes // f)).from_address(ctypes.cast(ptr, ctypes.c_void_p).value)
+            self._ring = np.ctypeslib.as_array(mem).reshape(self.RING, capacity, self.FLOATS)
+            self._fences = [None] * self.RING
+            self._slot = 0
+            self.buf = self._ring[0]
+        else:
+            self.buf = np.empty((capacity, self.FLOATS), dtype=np.float32)
+            glBufferData(GL_ARRAY_BUFFER, self.buf.nbytes, None, GL_STREAM_DRAW)
+        for loc, size, off in self.ATTRIBS:
+            glEnableVertexAttribArray(loc)
+            if separate_format:
+                glVertexAttribFormat(loc, size, GL_FLOAT, GL_FALSE, off * f)
+                glVertexAttribBinding(loc, 1)
+            else:
+                glVertexAttribPointer(loc, size, GL_FLOAT, GL_FALSE, stride, VPTR[off])
+                glVertexAttribDivisor(loc, 1)
+        if separate_format:
+            glBindVertexBuffer(1, self.vbo, 0, stride)
+            glVertexBindingDivisor(1, 1)
         glBindBuffer(GL_ARRAY_BUFFER, 0)
-        glBindVertexArray(0)
 
-    def draw_text(self, prog, text: str, left_ndc: float, top_ndc: float, color=(1,1,1,1), alpha=1.0):
-        """Emit quads and draw. left_ndc, top_ndc are NDC coords where top-left of text will be."""
-        if not USE_PIL or self.atlas.tex == 0:
+    def alloc(self, n: int) -> np.ndarray:
+        """Reserve n instances at the end of the batch and return them as a writable (n, 12) view.
+
+        n may not exceed capacity in either mode: a persistent slot holds exactly
+        capacity instances, so larger runs must be split by the caller.
+        """
+        if n > self.capacity:
+            raise ValueError(f"UIBatch.alloc: {n} instances exceeds capacity {self.capacity}")
+        end = self.count + n
+        if end > len(self.buf):
+            if self.persistent:
+                # slot full: draw what is queued and continue in the next slot
+                self.flush()
+                end = n
+            else:
+                grown = np.empty((max(end, 2 * len(self.buf)), self.FLOATS), dtype=np.float32)
+                grown[:self.count] = self.buf[:self.count]
+                self.buf = grown
+        view = self.buf[self.count:end]
+        self.count = end
+        return view
+
+    def flush(self):
+        """Draw everything queued since the last flush with a single instanced draw."""
+        if self.count == 0:
             return
-        vp = glGetIntegerv(GL_VIEWPORT)
-        win_w, win_h = vp[2], vp[3]
-        # compute pixel sizes and map to ndc for each glyph
-        # build array of vertices for all glyph quads
-        verts = []
-        pen_x = left_ndc
-        pen_y = top_ndc
-        for ch in text:
-            g = self.atlas.get_glyph(ch)
-            if g is None:
-                # advance by space approx
-                space_px = self.atlas.font_size if self.atlas.font_size else 10
-                ndc_advance = (space_px / win_w) * 2.0
-                pen_x += ndc_advance
-                continue
-            gx, gy, gw, gh = g
-            ndc_w = (gw / win_w) * 2.0
-            ndc_h = (gh / win_h) * 2.0
-            left = pen_x
-            right = pen_x + ndc_w
-            top = pen_y
-            bottom = pen_y - ndc_h
-            uv_left = gx / self.atlas.tex_w
-            uv_top = gy / self.atlas.tex_h
-            uv_right = (gx + gw) / self.atlas.tex_w
-            uv_bottom = (gy + gh) / self.atlas.tex_h
-            # two triangles
-            # tri1
-            verts += [left, bottom, uv_left, uv_bottom, alpha]
-            verts += [right, bottom, uv_right, uv_bottom, alpha]
-            verts += [right, top, uv_right, uv_top, alpha]
-            # tri2
-            verts += [left, bottom, uv_left, uv_bottom, alpha]
-            verts += [right, top, uv_right, uv_top, alpha]
-            verts += [left, top, uv_left, uv_top, alpha]
-            pen_x += ndc_w  # simple horizontal advance
-        if len(verts) == 0:
+        # unit 0 is the only texture unit ever used, so it is never switched
+        use_program(self.prog)
+        bind_texture(self.tex)
+        bind_vertex_array(self.vao)
+        if self.persistent:
+            # instances are already in the mapped slot (coherent, no upload)
+            glDrawArraysInstancedBaseInstance(GL_TRIANGLE_STRIP, 0, 4, self.count, self._slot * len(self.buf))
+            self._fences[self._slot] = glFenceSync(GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+            self._slot = (self._slot + 1) % self.RING
+            self._wait_slot(self._slot)
+            self.buf = self._ring[self._slot]
+        else:
+            arr = self.buf[:self.count]
+            glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+            # orphan the old storage (sized to the staging array, which may have grown)
+            # so the upload never waits on a draw still reading last frame's instances
+            glBufferData(GL_ARRAY_BUFFER, self.buf.nbytes, None, GL_STREAM_DRAW)
+            glBufferSubData(GL_ARRAY_BUFFER, 0, arr.nbytes, arr)
+            glDrawArraysInstanced(GL_TRIANGLE_STRIP, 0, 4, self.count)
+        # state stays bound: the cache rebinds only what the next draw changes
+        self.count = 0
+
+    def _wait_slot(self, slot: int):
+        # block until the GPU has finished the draw that last used this slot
+        fence = self._fences[slot]
+        if fence is None:
             return
-        arr = np.array(verts, dtype=np.float32)
-        glUseProgram(prog)
-        glUniform4f(glGetUniformLocation(prog, "u_color"), *color)
-        # bind atlas
-        glActiveTexture(GL_TEXTURE0)
-        glBindTexture(GL_TEXTURE_2D, self.atlas.tex)
-        glUniform1i(glGetUniformLocation(prog, "u_tex"), 0)
-        glBindVertexArray(self.vao)
-        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
-        glBufferData(GL_ARRAY_BUFFER, arr.nbytes, arr, GL_DYNAMIC_DRAW)
-        glDrawArrays(GL_TRIANGLES, 0, int(len(arr) / 5))
-        glBindBuffer(GL_ARRAY_BUFFER, 0)
-        glBindVertexArray(0)
-        glBindTexture(GL_TEXTURE_2D, 0)
-        glUseProgram(0)
+        while glClientWaitSync(fence, GL_SYNC_FLUSH_COMMANDS_BIT, 1_000_000) == GL_TIMEOUT_EXPIRED:
+            pass
+        glDeleteSync(fence)
+        self._fences[slot] = None
+
+    def delete(self):
+        if self.persistent:
+            for fence in self._fences:
+                if fence is not None:
+                    glDeleteSync(fence)
+        glDeleteVertexArrays(1, [self.vao])
+        glDeleteBuffers(2, [self.quad_vbo, self.vbo])
 
 # ---------- Focusable UI dataclasses ----------
 @dataclass
@@ -283,7 +530,18 @@ class FocusableButton:
     focused: bool = False
     visible: bool = True
     enabled: bool = True
-    def contains(self, nx, ny): return (self.cx - self.w/2 <= nx <= self.cx + self.w/2 and self.cy - self.h/2 <= ny <= self.cy + self.h/2)
+    base_color: tuple = (1.0, 1.0, 1.0)  # fill rgb; alpha comes from hover_alpha/idle_alpha
+    hover_alpha: float = 0.95
+    idle_alpha: float = 0.75
+    _label_draw: Optional[np.ndarray] = field(default=None, repr=False)  # cached label layout
+    x0: float = field(init=False, repr=False); x1: float = field(init=False, repr=False)
+    y0: float = field(init=False, repr=False); y1: float = field(init=False, repr=False)
+    def __post_init__(self): self.update_bounds()
+    def update_bounds(self):
+        # call after changing cx/cy/w/h
+        self.x0 = self.cx - self.w/2; self.x1 = self.cx + self.w/2
+        self.y0 = self.cy - self.h/2; self.y1 = self.cy + self.h/2
+    def contains(self, nx, ny): return self.x0 <= nx <= self.x1 and self.y0 <= ny <= self.y1
 
 @dataclass
 class FocusableSlider:
@@ -292,28 +550,61 @@ class FocusableSlider:
     focused: bool = False
     visible: bool = True
     enabled: bool = True
+    _label_draw: Optional[np.ndarray] = field(default=None, repr=False)  # cached label layout
     def normalized(self): return (self.value - self.minv) / (self.maxv - self.minv)
     def set_from_norm(self, t): self.value = self.minv + clamp(t, 0.0, 1.0) * (self.maxv - self.minv)
-    def contains(self, nx, ny): return (self.cx - self.w/2 <= nx <= self.cx + self.w/2 and self.cy - self.h/2 <= ny <= self.cy + self.h/2)
+    x0: float = field(init=False, repr=False); x1: float = field(init=False, repr=False)
+    y0: float = field(init=False, repr=False); y1: float = field(init=False, repr=False)
+    def __post_init__(self): self.update_bounds()
+    def update_bounds(self):
+        # call after changing cx/cy/w/h
+        self.x0 = self.cx - self.w/2; self.x1 = self.cx + self.w/2
+        self.y0 = self.cy - self.h/2; self.y1 = self.cy + self.h/2
+    def contains(self, nx, ny): return self.x0 <= nx <= self.x1 and self.y0 <= ny <= self.y1
+
+def control_bounds(controls):
+    return np.array([[c.x0, c.y0, c.x1, c.y1] for c in controls], dtype=np.float32).reshape(-1, 4)
+
+def slider_ranges(sliders):
+    # (track left, track width, min, max - min) per slider
+    return np.array([[s.x0, s.w, s.minv, s.maxv - s.minv] for s in sliders], dtype=np.float32).reshape(-1, 4)
+
+def knob_xs(ranges, sliders):
+    # knob centre x of every slider in one vector op
+    vals = np.fromiter((s.value for s in sliders), dtype=np.float32, count=len(sliders))
+    return (ranges[:,0] + (vals - ranges[:,2]) / ranges[:,3] * ranges[:,1]).tolist()
+
+def hit_index(bounds, nx, ny):
+    # index of the first control containing (nx, ny), or -1
+    m = (bounds[:,0]<=nx) & (nx<=bounds[:,2]) & (bounds[:,1]<=ny) & (ny<=bounds[:,3])
+    return int(np.argmax(m)) if m.any() else -1
 
 # ---------- Main window class ----------
 class GameFullUI:
+    _IDENTITY4 = np.eye(4, dtype=np.float32)
+
     def __init__(self, w=1280, h=720, title="Full UI Game"):
         if not glfw.init():
             raise RuntimeError("glfw.init failed")
-        glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, 3)
-        glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, 3)
-        glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
         self.w, self.h = w, h
-        self.win = glfw.create_window(w, h, title, None, None)
+        # prefer 4.4 core (persistent-mapped buffers), fall back to 3.3 core
+        for self.gl_version in ((4, 4), (3, 3)):
+            glfw.window_hint(glfw.CONTEXT_VERSION_MAJOR, self.gl_version[0])
+            glfw.window_hint(glfw.CONTEXT_VERSION_MINOR, self.gl_version[1])
+            glfw.window_hint(glfw.OPENGL_PROFILE, glfw.OPENGL_CORE_PROFILE)
+            self.win = glfw.create_window(w, h, title, None, None)
+            if self.win:
+                break
         if not self.win:
             glfw.terminate(); raise RuntimeError("Failed to create window")
+        self.title = title
         glfw.set_window_pos(self.win, 200, 120)
         glfw.make_context_current(self.win)
+        reset_gl_state()
         glfw.swap_interval(1)
         # programs
-        self.prog_tri = compile_program(VERT_TRI, FRAG_TRI)
-        self.prog_ui = compile_program(VERT_UI, FRAG_UI)
+        self.prog_tri, self.uni_tri = compile_program(VERT_TRI, FRAG_TRI)
+        self.prog_ui, self.uni_ui = compile_program(VERT_UI, FRAG_UI)
         # triangle VAO/VBO
         tri_data = np.array([
             -0.5,-0.5,0.0,  1.0,0.0,0.0,
@@ -326,27 +617,41 @@ class GameFullUI:
         ], dtype=np.float32)
         self.tri_vao = glGenVertexArrays(1)
         self.tri_vbo = glGenBuffers(1)
-        glBindVertexArray(self.tri_vao)
+        bind_vertex_array(self.tri_vao)
         glBindBuffer(GL_ARRAY_BUFFER, self.tri_vbo)
         glBufferData(GL_ARRAY_BUFFER, tri_data.nbytes, tri_data, GL_STATIC_DRAW)
-        stride = 6 * ctypes.sizeof(ctypes.c_float)
-        glEnableVertexAttribArray(0); glVertexAttribPointer(0,3,GL_FLOAT,GL_FALSE,stride,ctypes.c_void_p(0))
-        glEnableVertexAttribArray(1); glVertexAttribPointer(1,3,GL_FLOAT,GL_FALSE,stride,ctypes.c_void_p(3*ctypes.sizeof(ctypes.c_float)))
-        glBindBuffer(GL_ARRAY_BUFFER, 0); glBindVertexArray(0)
-        # UI VAO/VBO for colored rectangles (pos.xy, uv.xy, alpha)
-        GameFullUI.ui_vao = glGenVertexArrays(1)
-        GameFullUI.ui_vbo = glGenBuffers(1)
-        glBindVertexArray(GameFullUI.ui_vao)
-        glBindBuffer(GL_ARRAY_BUFFER, GameFullUI.ui_vbo)
-        glBufferData(GL_ARRAY_BUFFER, 4096, None, GL_DYNAMIC_DRAW)
-        # layout: pos.xy (2), uv.xy (2), alpha (1) -- total 5 floats
-        glEnableVertexAttribArray(0); glVertexAttribPointer(0,2,GL_FLOAT,GL_FALSE,5*ctypes.sizeof(ctypes.c_float),ctypes.c_void_p(0))
-        glEnableVertexAttribArray(1); glVertexAttribPointer(1,2,GL_FLOAT,GL_FALSE,5*ctypes.sizeof(ctypes.c_float),ctypes.c_void_p(2*ctypes.sizeof(ctypes.c_float)))
-        glEnableVertexAttribArray(2); glVertexAttribPointer(2,1,GL_FLOAT,GL_FALSE,5*ctypes.sizeof(ctypes.c_float),ctypes.c_void_p(4*ctypes.sizeof(ctypes.c_float)))
-        glBindBuffer(GL_ARRAY_BUFFER, 0); glBindVertexArray(0)
+        stride = 6 * SZ_F
+        glEnableVertexAttribArray(0); glVertexAttribPointer(0,3,GL_FLOAT,GL_FALSE,stride,VPTR[0])
+        glEnableVertexAttribArray(1); glVertexAttribPointer(1,3,GL_FLOAT,GL_FALSE,stride,VPTR[3])
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
         # glyph atlas & text renderer
         self.atlas = GlyphAtlas(font_size=24) if USE_PIL else GlyphAtlas(None)  # will print if PIL missing
         self.text_renderer = TextRenderer(self.atlas) if (USE_PIL and self.atlas.tex != 0) else None
+        self.viewport = (0, 0, w, h)
+        if self.text_renderer:
+            self.text_renderer.set_viewport(w, h)
+        # one batch for all UI rects + glyphs; rects sample the atlas' white block,
+        # or a 1x1 white texture when there is no atlas
+        self.white_tex = 0
+        if self.atlas.tex != 0:
+            self.ui_tex = self.atlas.tex
+        else:
+            pix = bytes([255,255,255,255])
+            self.white_tex = glGenTextures(1)
+            bind_texture(self.white_tex)
+            glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, 1,1,0,GL_RGBA,GL_UNSIGNED_BYTE, pix)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+            self.ui_tex = self.white_tex
+        self.white_uv = self.atlas.white_uv
+        self.ui_batch = UIBatch(self.prog_ui, self.ui_tex,
+                                persistent=self.gl_version >= (4, 4) and bool(glBufferStorage),
+                                separate_format=self.gl_version >= (4, 3) and bool(glVertexAttribFormat))
+        # UI coords are already NDC: identity projection, atlas on unit 0
+        use_program(self.prog_ui)
+        glUniformMatrix4fv(self.uni_ui["u_proj"], 1, GL_FALSE, GameFullUI._IDENTITY4)
+        glUniform1i(self.uni_ui["u_tex"], 0)
         # UI controls
         self.home_buttons: List[FocusableButton] = []
         self.menu_buttons: List[FocusableButton] = []
@@ -358,23 +663,50 @@ class GameFullUI:
         self.tri_speed = 1.0
         # create focusable controls using wrapper dataclasses mapping to rendering coordinates
         # Home/Menu: Start, Options, Quit (same coords)
-        start_btn = FocusableButton(0.0, 0.28, 1.0, 0.24, "Start", action=lambda: self.start_game())
-        options_btn = FocusableButton(0.0, -0.02, 1.0, 0.24, "Options", action=lambda: self.toggle_options())
-        quit_btn = FocusableButton(0.0, -0.36, 1.0, 0.24, "Quit", action=lambda: self.quit_game())
+        start_btn = FocusableButton(0.0, 0.28, 1.0, 0.24, "Start", action=lambda: self.start_game(),
+                                    base_color=(0.12, 0.6, 0.2))
+        options_btn = FocusableButton(0.0, -0.02, 1.0, 0.24, "Options", action=lambda: self.toggle_options(),
+                                      base_color=(0.12, 0.4, 0.8))
+        quit_btn = FocusableButton(0.0, -0.36, 1.0, 0.24, "Quit", action=lambda: self.quit_game(),
+                                   base_color=(0.8, 0.15, 0.2))
         self.home_buttons = [start_btn, options_btn, quit_btn]
         self.menu_buttons = [start_btn, options_btn, quit_btn]
-        # pause menu centered buttons
-        resume_btn = FocusableButton(0.0, 0.18, 0.6, 0.18, "Resume", action=lambda: self.resume_from_pause())
-        p_options_btn = FocusableButton(0.0, -0.02, 0.6, 0.18, "Options", action=lambda: self.toggle_options())
-        main_btn = FocusableButton(0.0, -0.22, 0.6, 0.18, "Main Menu", action=lambda: self.goto_menu())
-        p_quit_btn = FocusableButton(0.0, -0.42, 0.6, 0.18, "Quit", action=lambda: self.quit_game())
+        # pause menu centered buttons (drawn at full strength whether hovered or not)
+        resume_btn = FocusableButton(0.0, 0.18, 0.6, 0.18, "Resume", action=lambda: self.resume_from_pause(),
+                                     base_color=(0.15, 0.7, 0.2), idle_alpha=0.95)
+        p_options_btn = FocusableButton(0.0, -0.02, 0.6, 0.18, "Options", action=lambda: self.toggle_options(),
+                                        base_color=(0.12, 0.45, 0.85), idle_alpha=0.95)
+        main_btn = FocusableButton(0.0, -0.22, 0.6, 0.18, "Main Menu", action=lambda: self.goto_menu(),
+                                   base_color=(0.8, 0.4, 0.15), idle_alpha=0.95)
+        p_quit_btn = FocusableButton(0.0, -0.42, 0.6, 0.18, "Quit", action=lambda: self.quit_game(),
+                                     base_color=(0.9, 0.1, 0.2), idle_alpha=0.95)
         self.pause_buttons = [resume_btn, p_options_btn, main_btn, p_quit_btn]
         # options sliders
         s_scale = FocusableSlider(0.0, 0.10, 0.7, 0.10, 0.2, 3.0, 1.0, label="Triangle scale")
         s_speed = FocusableSlider(0.0, -0.10, 0.7, 0.10, 0.1, 3.0, 1.0, label="Triangle speed")
         self.options_sliders = [s_scale, s_speed]
+        # HUD buttons, only reachable through keyboard/gamepad focus
+        self.hud_buttons = [
+            FocusableButton(-0.9, 0.85, 0.12, 0.08, "Pause", action=self._open_pause),
+            FocusableButton(-0.74, 0.85, 0.22, 0.08, "MainMenu", action=self.goto_menu),
+        ]
+        # per-layer draw data for the button layers; controls never move, so built once
+        self._layer_cmds = {
+            "home": self._button_cmds(self.home_buttons),
+            "menu": self._button_cmds(self.menu_buttons),
+            "pause": self._button_cmds(self.pause_buttons),
+        }
+        # hit-test bounds per control group; controls never move, so built once
+        self._btn_bounds = {
+            "home": control_bounds(self.home_buttons),
+            "menu": control_bounds(self.menu_buttons),
+            "pause": control_bounds(self.pause_buttons),
+            "options": control_bounds(self.options_sliders),
+        }
+        self._slider_ranges = slider_ranges(self.options_sliders)
         # focus system
-        self.focus_list: List = []  # built each frame
+        self.focus_list: List = []  # rebuilt only when _focus_dirty is set
+        self._focus_dirty = True
         self.focus_index = 0
         self.focus_time_last = 0.0
         # navigation repeat timers
@@ -399,6 +731,7 @@ class GameFullUI:
         self.options_slide = -0.6  # y offset when hidden, slides to 0
         # timing for FPS
         self.last_time = time.time()
+        self.start_time = self.last_time  # u_time origin for the triangle shader
         self.fps = 0.0; self.frame_count = 0; self.fps_last = time.time()
         # callbacks
         glfw.set_mouse_button_callback(self.win, self.on_mouse)
@@ -413,6 +746,7 @@ class GameFullUI:
         self.scene = "playing"
         self.paused = False
         self.pause_menu_open = False
+        self._focus_dirty = True
 
     def quit_game(self):
         glfw.set_window_should_close(self.win, True)
@@ -422,18 +756,30 @@ class GameFullUI:
         self.show_options = False
         self.paused = False
         self.pause_menu_open = False
+        self._focus_dirty = True
 
     def resume_from_pause(self):
         self.paused = False
         self.pause_menu_open = False
+        self._focus_dirty = True
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        self.pause_menu_open = self.paused
+        self._focus_dirty = True
 
     def toggle_options(self):
         self.show_options = not self.show_options
+        self._focus_dirty = True
 
     # ---------- input handlers ----------
     def on_resize(self, wdw, width, height):
         self.w, self.h = width, height
-        glViewport(0, 0, width, height)
+        self.viewport = (0, 0, width, height)
+        glViewport(*self.viewport)
+        if self.text_renderer:
+            self.text_renderer.set_viewport(width, height)
+        self._focus_dirty = True
 
     def window_coords_to_ndc(self, mx, my):
         nx = (mx / self.w) * 2.0 - 1.0
@@ -449,15 +795,17 @@ class GameFullUI:
             btns = self.home_buttons if self.scene=="home" else self.menu_buttons
             # if options visible then prefer sliders
             if self.show_options:
-                for s in self.options_sliders:
-                    if s.contains(nx, ny):
-                        s.dragging = True; s.focused = True
-                        self.focus_list = [s]; self.focus_index = 0
-                        return
+                i = hit_index(self._btn_bounds["options"], nx, ny)
+                if i >= 0:
+                    s = self.options_sliders[i]
+                    s.dragging = True; s.focused = True
+                    self.focus_list = [s]; self.focus_index = 0
+                    self._focus_dirty = True
+                    return
             else:
-                for i, b in enumerate(btns):
-                    if b.contains(nx, ny):
-                        b.action(); return
+                i = hit_index(self._btn_bounds[self.scene], nx, ny)
+                if i >= 0:
+                    btns[i].action(); return
         elif self.scene == "playing":
             # top-left pause box and menu box
             pause_box = (-0.9, 0.85, 0.12, 0.08)
@@ -467,12 +815,12 @@ class GameFullUI:
             mx_box = (-0.74,0.85,0.22,0.08)
             # If pause open, route to pause menu buttons intersection
             if self.pause_menu_open:
-                for b in self.pause_buttons:
-                    if b.contains(nx, ny):
-                        b.action(); return
+                i = hit_index(self._btn_bounds["pause"], nx, ny)
+                if i >= 0:
+                    self.pause_buttons[i].action(); return
             # otherwise if clicked pause icon, open pause
             if if_pause:
-                self.paused = True; self.pause_menu_open = True
+                self._open_pause()
                 return
 
     def on_key(self, wdw, key, scancode, action, mods):
@@ -481,8 +829,7 @@ class GameFullUI:
         if key == glfw.KEY_ESCAPE:
             if self.scene == "playing":
                 # toggle pause menu
-                self.paused = not self.paused
-                self.pause_menu_open = self.paused
+                self.toggle_pause()
             else:
                 glfw.set_window_should_close(self.win, True)
         elif key in (glfw.KEY_ENTER, glfw.KEY_KP_ENTER):
@@ -504,14 +851,17 @@ class GameFullUI:
             self.toggle_options()
         elif key == glfw.KEY_P:
             if self.scene == "playing":
-                self.paused = not self.paused
-                self.pause_menu_open = self.paused
+                self.toggle_pause()
         elif key == glfw.KEY_Q:
             glfw.set_window_should_close(self.win, True)
 
     # ---------- focus & navigation ----------
     def build_focus_list(self):
-        # builds current visible focusable controls in render order
+        # builds current visible focusable controls in render order;
+        # cheap no-op unless a scene/options/pause change marked it dirty
+        if not self._focus_dirty:
+            return
+        self._focus_dirty = False
         lst = []
         if self.scene == "home":
             if self.show_options:
@@ -531,9 +881,7 @@ class GameFullUI:
                     lst.extend(self.pause_buttons)
             else:
                 # HUD buttons small — add them for navigation
-                # create lightweight focusable for pause & main menu HUD
-                lst.append(FocusableButton(-0.9,0.85,0.12,0.08,"Pause", action=lambda: self._open_pause()))
-                lst.append(FocusableButton(-0.74,0.85,0.22,0.08,"MainMenu", action=lambda: self.goto_menu()))
+                lst.extend(self.hud_buttons)
         # copy into self.focus_list
         self.focus_list = lst
         if len(self.focus_list) == 0:
@@ -544,6 +892,7 @@ class GameFullUI:
 
     def _open_pause(self):
         self.paused = True; self.pause_menu_open = True
+        self._focus_dirty = True
 
     def move_focus(self, delta: int):
         self.build_focus_list()
@@ -568,7 +917,7 @@ class GameFullUI:
             f.action()
         elif isinstance(f, FocusableSlider):
             # slider activation toggles dragging
-            f.dragging = not getattr(f, "dragging", False)
+            f.dragging = not f.dragging
 
     def adjust_slider(self, delta_norm):
         # adjust currently focused slider if any
@@ -620,56 +969,37 @@ class GameFullUI:
                 self.nav_last = tnow
 
     # ---------- rendering helpers ----------
-    def tri_model(self, t, scale=1.0):
-        tx = math.sin(t) * 0.45; ty = math.cos(t) * 0.25
-        s = (abs(math.sin(t))*0.5*scale + 0.3)
-        ang = math.sin(t) * math.radians(45.0)
-        c = math.cos(ang); sa = math.sin(ang)
-        mat = np.array([
-            [c*s, -sa*s, 0, 0],
-            [sa*s, c*s,  0, 0],
-            [0,    0,    1, 0],
-            [tx,   ty,   0, 1],
-        ], dtype=np.float32)
-        return mat
+    def set_title(self, title):
+        # the window title is a platform call: only issue it when the text changes
+        if title != self.title:
+            self.title = title
+            glfw.set_window_title(self.win, title)
 
     def draw_rect(self, cx, cy, w, h, color, alpha=1.0):
-        left = cx - w/2; right = cx + w/2; top = cy + h/2; bottom = cy - h/2
-        quad = np.array([
-            left, bottom, 0.0, 1.0, alpha,
-            right, bottom, 1.0, 1.0, alpha,
-            right, top,    1.0, 0.0, alpha,
-            left, bottom, 0.0, 1.0, alpha,
-            right, top,    1.0, 0.0, alpha,
-            left, top,     0.0, 0.0, alpha,
-        ], dtype=np.float32)
-        glUseProgram(self.prog_ui)
-        # bind white texture (create if needed)
-        if not hasattr(self, "white_tex") or self.white_tex == 0:
-            pix = bytes([255,255,255,255])
-            self.white_tex = glGenTextures(1)
-            glBindTexture(GL_TEXTURE_2D, self.white_tex)
-            glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
-            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, 1,1,0,GL_RGBA,GL_UNSIGNED_BYTE, pix)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
-            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
-            glBindTexture(GL_TEXTURE_2D, 0)
-        glActiveTexture(GL_TEXTURE0)
-        glBindTexture(GL_TEXTURE_2D, self.white_tex)
-        glUniform1i(glGetUniformLocation(self.prog_ui, "u_tex"), 0)
-        glUniform4f(glGetUniformLocation(self.prog_ui, "u_color"), *color)
-        glBindVertexArray(GameFullUI.ui_vao)
-        glBindBuffer(GL_ARRAY_BUFFER, GameFullUI.ui_vbo)
-        glBufferData(GL_ARRAY_BUFFER, quad.nbytes, quad, GL_DYNAMIC_DRAW)
-        glDrawArrays(GL_TRIANGLES, 0, 6)
-        glBindBuffer(GL_ARRAY_BUFFER, 0)
-        glBindVertexArray(0)
-        glBindTexture(GL_TEXTURE_2D, 0)
-        glUseProgram(0)
+        inst = self.ui_batch.alloc(1)[0]
+        inst[0:4] = (cx - w/2, cy - h/2, w, h)
+        inst[4:6] = self.white_uv
+        inst[6:8] = 0.0
+        inst[8:12] = color
+        inst[11] *= alpha
+
+    @staticmethod
+    def _button_cmds(buttons):
+        # (button, rect, focus outline rect, label left, label top) per button
+        return [(b, (b.cx, b.cy, b.w, b.h), (b.cx, b.cy, b.w+0.04, b.h+0.04), b.x0 + 0.02, b.y1 - 0.02)
+                for b in buttons]
+
+    def draw_label(self, b, left, top, color=(1,1,1,1), alpha=1.0):
+        # button/slider labels are immutable: lay them out the first time they are drawn
+        if b._label_draw is None:
+            b._label_draw = self.text_renderer.build_static(b.label)
+        self.text_renderer.draw_static(self.ui_batch, b._label_draw, left, top, color, alpha)
 
     # ---------- main loop ----------
     def run(self):
-        glViewport(0,0,self.w,self.h)
+        glViewport(*self.viewport)
+        # locals: the frame loop calls these many times per frame
+        _lerp, _clamp, _smoothstep, _ease = lerp, clamp, smoothstep, ease_out_cubic
         while not glfw.window_should_close(self.win):
             now = time.time()
             dt = now - self.last_time if self.last_time else 0.0
@@ -689,12 +1019,12 @@ class GameFullUI:
             target_home = 1.0 if self.scene=="home" else 0.0
             target_menu = 1.0 if (self.scene=="menu") else 0.0
             target_pause = 1.0 if (self.pause_menu_open) else 0.0
-            self.home_alpha = lerp(self.home_alpha, target_home, clamp(dt*6.0, 0.0, 1.0))
-            self.menu_alpha = lerp(self.menu_alpha, target_menu, clamp(dt*6.0, 0.0, 1.0))
-            self.pause_alpha = lerp(self.pause_alpha, target_pause, clamp(dt*8.0, 0.0, 1.0))
+            self.home_alpha = _lerp(self.home_alpha, target_home, _clamp(dt*6.0, 0.0, 1.0))
+            self.menu_alpha = _lerp(self.menu_alpha, target_menu, _clamp(dt*6.0, 0.0, 1.0))
+            self.pause_alpha = _lerp(self.pause_alpha, target_pause, _clamp(dt*8.0, 0.0, 1.0))
             # options slide target 0 if visible else -0.6
             target_slide = 0.0 if self.show_options else -0.6
-            self.options_slide = lerp(self.options_slide, target_slide, clamp(dt*8.0, 0.0, 1.0))
+            self.options_slide = _lerp(self.options_slide, target_slide, _clamp(dt*8.0, 0.0, 1.0))
 
             glfw.poll_events()
             # handle dragging for sliders (mouse)
@@ -705,9 +1035,8 @@ class GameFullUI:
             if mb_left == glfw.PRESS:
                 # if options open, update any dragging slider
                 for s in self.options_sliders:
-                    if s.visible and getattr(s, "dragging", False):
-                        left = s.cx - s.w/2; right = s.cx + s.w/2
-                        tnorm = (nx - left) / (right - left)
+                    if s.visible and s.dragging:
+                        tnorm = (nx - s.x0) / s.w
                         s.set_from_norm(tnorm)
             else:
                 # release dragging
@@ -715,95 +1044,81 @@ class GameFullUI:
                     s.dragging = False
 
             # clear
-            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            glClear(GL_COLOR_BUFFER_BIT)
 
             # draw background triangle (with shader)
-            glUseProgram(self.prog_tri)
-            t = now
-            model = self.tri_model(t, scale=self.options_sliders[0].value if self.options_sliders else 1.0)
-            glUniformMatrix4fv(glGetUniformLocation(self.prog_tri, "u_model"), 1, GL_FALSE, model)
-            glUniformMatrix4fv(glGetUniformLocation(self.prog_tri, "u_vp"), 1, GL_FALSE, np.eye(4, dtype=np.float32))
-            glBindVertexArray(self.tri_vao)
+            use_program(self.prog_tri)
+            # the model matrix is built in VERT_TRI from two scalars
+            glUniform1f(self.uni_tri["u_time"], now - self.start_time)
+            glUniform1f(self.uni_tri["u_scale"], self.options_sliders[0].value if self.options_sliders else 1.0)
+            bind_vertex_array(self.tri_vao)
             glDrawArrays(GL_TRIANGLES, 0, 3)
-            glBindVertexArray(0)
-            glUseProgram(0)
 
             # Layers based on scene & transitions
             # HOME
-            if self.home_alpha > 0.001:
+            if self.home_alpha > MIN_ALPHA:
                 alpha = self.home_alpha
                 # title panel slide slightly from top: implement by shifting y coords using alpha
-                title_y = lerp(0.62+0.2, 0.62, smoothstep(alpha))
+                title_y = _lerp(0.62+0.2, 0.62, _smoothstep(alpha))
                 # draw title rect
                 self.draw_rect(0.0, title_y, 1.6, 0.34, color=(0.02,0.02,0.04,0.7*alpha), alpha=alpha)
                 # buttons (Start/Options/Quit)
-                for i, b in enumerate(self.home_buttons):
-                    hovered = b.contains(nx, ny)
-                    col = (0.12, 0.6, 0.2, 0.95*alpha) if i==0 else None
-                    if b.label == "Start":
-                        self.draw_rect(b.cx, b.cy, b.w, b.h, (0.12,0.6,0.2,0.95*alpha if hovered else 0.75*alpha), alpha=alpha)
-                    elif b.label == "Options":
-                        self.draw_rect(b.cx, b.cy, b.w, b.h, (0.12,0.4,0.8,0.95*alpha if hovered else 0.75*alpha), alpha=alpha)
-                    else:
-                        self.draw_rect(b.cx, b.cy, b.w, b.h, (0.8,0.15,0.2,0.95*alpha if hovered else 0.75*alpha), alpha=alpha)
+                home_cmds = self._layer_cmds["home"]
+                for b, rect, _, _, _ in home_cmds:
+                    a = (b.hover_alpha if b.contains(nx, ny) else b.idle_alpha) * alpha
+                    self.draw_rect(*rect, (*b.base_color, a), alpha=alpha)
                 # draw text via atlas
                 if self.text_renderer:
-                    glUseProgram(self.prog_ui)
                     # label positions
-                    self.text_renderer.draw_text(self.prog_ui, "MY AWESOME GAME", -0.6, 0.78, color=(1,1,1,1), alpha=alpha)
+                    tr = self.text_renderer
+                    tr.draw_static(self.ui_batch, tr.build_static("MY AWESOME GAME"), -0.6, 0.78, alpha=alpha)
                     # button labels
-                    for b in self.home_buttons:
-                        left_x = b.cx - b.w/2 + 0.02
-                        top_y = b.cy + b.h/2 - 0.02
+                    for b, _, outline, left_x, top_y in home_cmds:
                         # focus highlight
-                        if getattr(b, "focused", False):
+                        if b.focused:
                             # draw outline rect
-                            self.draw_rect(b.cx, b.cy, b.w+0.04, b.h+0.04, (1.0,1.0,1.0,0.12*alpha), alpha=alpha)
-                        self.text_renderer.draw_text(self.prog_ui, b.label, left_x, top_y, color=(1,1,1,1), alpha=alpha)
+                            self.draw_rect(*outline, (1.0,1.0,1.0,0.12*alpha), alpha=alpha)
+                        self.draw_label(b, left_x, top_y, alpha=alpha)
                     # FPS
-                    self.text_renderer.draw_text(self.prog_ui, f"FPS: {self.fps:.1f}", -0.98, -0.95, color=(1,1,1,1), alpha=alpha)
-                    glUseProgram(0)
+                    self.text_renderer.draw_text(self.ui_batch, f"FPS: {self.fps:.1f}", -0.98, -0.95, color=(1,1,1,1), alpha=alpha)
                 else:
-                    glfw.set_window_title(self.win, "Home - MY AWESOME GAME")
+                    self.set_title("Home - MY AWESOME GAME")
 
                 # options overlay if open (slide in)
                 if self.show_options:
                     # slide offset applied to panel center Y
-                    panel_y = lerp(-0.48, 0.04, ease_out_cubic(clamp((self.options_slide + 0.6) / 0.6, 0.0, 1.0)))
+                    panel_y = _lerp(-0.48, 0.04, _ease(_clamp((self.options_slide + 0.6) / 0.6, 0.0, 1.0)))
                     self.draw_rect(0.0, panel_y, 0.8, 0.46, (0.08,0.08,0.08,0.95*alpha), alpha=alpha)
                     # sliders + knobs
-                    for s in self.options_sliders:
+                    kxs = knob_xs(self._slider_ranges, self.options_sliders)
+                    for s, kx in zip(self.options_sliders, kxs):
                         # use y position offset by panel_y offset delta
                         s_y = s.cy + (panel_y - 0.04)
-                        left = s.cx - s.w/2; right = s.cx + s.w/2
+                        left = s.x0
                         self.draw_rect(s.cx, s_y, s.w, s.h, (0.2,0.2,0.2,0.95*alpha), alpha=alpha)
                         # knob
-                        tnorm = s.normalized()
-                        kx = left + tnorm * (right - left)
                         self.draw_rect(kx, s_y, 0.06, s.h+0.02, (0.9,0.9,0.2,1.0*alpha), alpha=alpha)
                         # labels
                         if self.text_renderer:
-                            self.text_renderer.draw_text(self.prog_ui, s.label, left+0.02, s_y + s.h/2 - 0.02, alpha=alpha)
-                            self.text_renderer.draw_text(self.prog_ui, f"{s.value:.2f}", s.cx + 0.34, s_y + s.h/2 - 0.02, alpha=alpha)
+                            self.draw_label(s, left+0.02, s_y + s.h/2 - 0.02, alpha=alpha)
+                            self.text_renderer.draw_text(self.ui_batch, f"{s.value:.2f}", s.cx + 0.34, s_y + s.h/2 - 0.02, alpha=alpha)
             # MENU (overlay)
-            if self.menu_alpha > 0.001:
+            if self.menu_alpha > MIN_ALPHA:
                 alpha = self.menu_alpha
                 self.draw_rect(0.0,0.0,2.0,2.0,(0,0,0,0.45*alpha), alpha=alpha)
                 # buttons
-                for i, b in enumerate(self.menu_buttons):
-                    hovered = b.contains(nx, ny)
-                    col = (0.12,0.6,0.2,0.95*alpha) if b.label=="Start" else (0.12,0.4,0.8,0.95*alpha) if b.label=="Options" else (0.8,0.15,0.2,0.95*alpha)
-                    self.draw_rect(b.cx, b.cy, b.w, b.h, (col[0],col[1],col[2],col[3]*(0.95 if hovered else 0.75)), alpha=alpha)
+                menu_cmds = self._layer_cmds["menu"]
+                # the overlay dims its buttons a little more than the home screen does
+                menu_a = 0.95 * alpha
+                for b, rect, _, _, _ in menu_cmds:
+                    a = (b.hover_alpha if b.contains(nx, ny) else b.idle_alpha) * menu_a
+                    self.draw_rect(*rect, (*b.base_color, a), alpha=alpha)
                 if self.text_renderer:
-                    glUseProgram(self.prog_ui)
-                    for b in self.menu_buttons:
-                        left_x = b.cx - b.w/2 + 0.02
-                        top_y = b.cy + b.h/2 - 0.02
-                        self.text_renderer.draw_text(self.prog_ui, b.label, left_x, top_y, alpha=alpha)
-                        if getattr(b, "focused", False):
-                            self.draw_rect(b.cx, b.cy, b.w+0.04, b.h+0.04, (1,1,1,0.12*alpha), alpha=alpha)
-                    self.text_renderer.draw_text(self.prog_ui, f"FPS: {self.fps:.1f}", -0.98, -0.95, alpha=alpha)
-                    glUseProgram(0)
+                    for b, _, outline, left_x, top_y in menu_cmds:
+                        self.draw_label(b, left_x, top_y, alpha=alpha)
+                        if b.focused:
+                            self.draw_rect(*outline, (1,1,1,0.12*alpha), alpha=alpha)
+                    self.text_renderer.draw_text(self.ui_batch, f"FPS: {self.fps:.1f}", -0.98, -0.95, alpha=alpha)
             # PLAYING HUD & Pause
             if self.scene == "playing":
                 # hud boxes
@@ -812,41 +1127,39 @@ class GameFullUI:
                 self.draw_rect(-0.9, 0.86, 0.12, 0.08, (0.9,0.5,0.0,1.0) if self.paused else (0.2,0.9,0.2,1.0))
                 self.draw_rect(-0.74, 0.86, 0.22, 0.08, (0.2,0.6,0.9,1.0))
                 if self.text_renderer:
-                    glUseProgram(self.prog_ui)
-                    self.text_renderer.draw_text(self.prog_ui, "Pause" if self.paused else "Playing", -0.78, 0.95)
-                    self.text_renderer.draw_text(self.prog_ui, "Main Menu", -0.78, 0.87)
-                    self.text_renderer.draw_text(self.prog_ui, f"FPS: {self.fps:.1f}", 0.8, 0.95)
-                    glUseProgram(0)
+                    tr = self.text_renderer
+                    tr.draw_static(self.ui_batch, tr.build_static("Pause" if self.paused else "Playing"), -0.78, 0.95)
+                    tr.draw_static(self.ui_batch, tr.build_static("Main Menu"), -0.78, 0.87)
+                    self.text_renderer.draw_text(self.ui_batch, f"FPS: {self.fps:.1f}", 0.8, 0.95)
                 # pause menu overlay
-                if self.pause_alpha > 0.001:
+                if self.pause_alpha > MIN_ALPHA:
                     alpha = self.pause_alpha
                     self.draw_rect(0.0,0.0,1.2,1.2,(0.02,0.02,0.02,0.6*alpha), alpha=alpha)
                     # central panel
                     self.draw_rect(0.0, 0.18, 0.64, 0.86, (0.08,0.08,0.08,0.98*alpha), alpha=alpha)
                     # buttons with focus/hover visible
-                    for b in self.pause_buttons:
-                        hovered = b.contains(nx, ny)
-                        col = (0.15,0.7,0.2,0.95*alpha) if b.label=="Resume" else (0.12,0.45,0.85,0.95*alpha) if b.label=="Options" else (0.8,0.4,0.15,0.95*alpha) if b.label=="Main Menu" else (0.9,0.1,0.2,0.95*alpha)
-                        self.draw_rect(b.cx, b.cy, b.w, b.h, col, alpha=alpha)
+                    pause_cmds = self._layer_cmds["pause"]
+                    for b, rect, _, _, _ in pause_cmds:
+                        a = (b.hover_alpha if b.contains(nx, ny) else b.idle_alpha) * alpha
+                        self.draw_rect(*rect, (*b.base_color, a), alpha=alpha)
                     # labels
                     if self.text_renderer:
-                        glUseProgram(self.prog_ui)
-                        for b in self.pause_buttons:
-                            left_x = b.cx - b.w/2 + 0.02
-                            top_y = b.cy + b.h/2 - 0.02
-                            self.text_renderer.draw_text(self.prog_ui, b.label, left_x, top_y, alpha=alpha)
-                            if getattr(b, "focused", False):
-                                self.draw_rect(b.cx, b.cy, b.w+0.04, b.h+0.04, (1,1,1,0.12*alpha), alpha=alpha)
+                        for b, _, outline, left_x, top_y in pause_cmds:
+                            self.draw_label(b, left_x, top_y, alpha=alpha)
+                            if b.focused:
+                                self.draw_rect(*outline, (1,1,1,0.12*alpha), alpha=alpha)
                         # if options open inside pause, draw them as smaller panel
                         if self.show_options:
                             self.draw_rect(0.0, -0.48, 0.8, 0.36, (0.08,0.08,0.08,0.95*alpha), alpha=alpha)
-                            for s in self.options_sliders:
+                            kxs = knob_xs(self._slider_ranges, self.options_sliders)
+                            for s, kx in zip(self.options_sliders, kxs):
                                 self.draw_rect(s.cx, s.cy - 0.48, s.w, s.h, (0.2,0.2,0.2,0.95*alpha), alpha=alpha)
-                                kx = s.cx - s.w/2 + s.normalized() * s.w
                                 self.draw_rect(kx, s.cy - 0.48, 0.06, s.h+0.02, (0.9,0.9,0.2,1.0*alpha), alpha=alpha)
-                                self.text_renderer.draw_text(self.prog_ui, s.label, s.cx - s.w/2 + 0.02, s.cy - 0.48 + s.h/2 - 0.02, alpha=alpha)
-                                self.text_renderer.draw_text(self.prog_ui, f"{s.value:.2f}", s.cx + 0.34, s.cy - 0.48 + s.h/2 - 0.02, alpha=alpha)
-                        glUseProgram(0)
+                                self.draw_label(s, s.x0 + 0.02, s.cy - 0.48 + s.h/2 - 0.02, alpha=alpha)
+                                self.text_renderer.draw_text(self.ui_batch, f"{s.value:.2f}", s.cx + 0.34, s.cy - 0.48 + s.h/2 - 0.02, alpha=alpha)
+
+            # all UI rects + text queued above go out in one draw
+            self.ui_batch.flush()
 
             # flip buffers
             glfw.swap_buffers(self.win)
@@ -856,10 +1169,9 @@ class GameFullUI:
         glDeleteProgram(self.prog_ui)
         glDeleteBuffers(1, [self.tri_vbo])
         glDeleteVertexArrays(1, [self.tri_vao])
-        if GameFullUI.ui_vao:
-            glDeleteVertexArrays(1, [GameFullUI.ui_vao])
-        if GameFullUI.ui_vbo:
-            glDeleteBuffers(1, [GameFullUI.ui_vbo])
+        self.ui_batch.delete()
+        if self.white_tex:
+            glDeleteTextures(1, [self.white_tex])
         glfw.terminate()
 
 # ---------- run ----------
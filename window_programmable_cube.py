@@ -1,9 +1,8 @@
 import glfw
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileShader, compileProgram
 import numpy as np
 from math import sin, cos
-import pyrr
+from shader_cache import load_program
 
 class Window:
 
@@ -47,22 +46,12 @@ class Window:
     def window_resize(window, width, height):
         glViewport(0, 0, width, height)
 
-    @staticmethod
-    def get_shaders(shader_program_name):
-        with open(f'shaders/{shader_program_name}.vert') as file:
-            vertex_shader = file.read()
-        with open(f'shaders/{shader_program_name}.frag') as file:
-            fragment_shader = file.read()
-
-        return vertex_shader, fragment_shader
-
     def draw(self):
         vertices = self.vertices
         indices = self.indices
 
-        vertex_src, fragment_src = self.get_shaders('default')
-
-        shader = compileProgram(compileShader(vertex_src, GL_VERTEX_SHADER), compileShader(fragment_src, GL_FRAGMENT_SHADER))
+        # compiled once, then reloaded from the cached driver binary on later runs
+        shader = load_program('default')
 
         VBO = glGenBuffers(1)
         glBindBuffer(GL_ARRAY_BUFFER, VBO)
@@ -83,10 +72,12 @@ class Window:
         glEnable(GL_DEPTH_TEST)
 
         self.rotation_loc = glGetUniformLocation(shader, 'rotation')
+        self._rot = np.identity(4, dtype=np.float32)
 
     def main_loop(self):
         num_indices = len(self.indices)
         rot_loc = self.rotation_loc
+        rotation = self._rot
         while not glfw.window_should_close(self._win):
 
             glfw.poll_events()
@@ -95,10 +86,21 @@ class Window:
 
             #glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
 
-            rot_x = pyrr.Matrix44.from_x_rotation(0.5 * glfw.get_time())
-            rot_y = pyrr.Matrix44.from_y_rotation(0.8 * glfw.get_time())
-
-            glUniformMatrix4fv(rot_loc, 1, GL_FALSE, pyrr.matrix44.multiply(rot_x, rot_y))
+            ct = glfw.get_time()
+            cx, sx = cos(0.5 * ct), sin(0.5 * ct)
+            cy, sy = cos(0.8 * ct), sin(0.8 * ct)
+
+            # rot_x(0.5 t) @ rot_y(0.8 t), written straight into the scratch matrix
+            rotation[0, 0] = cy
+            rotation[0, 2] = sy
+            rotation[1, 0] = sx * sy
+            rotation[1, 1] = cx
+            rotation[1, 2] = -sx * cy
+            rotation[2, 0] = -cx * sy
+            rotation[2, 1] = sx
+            rotation[2, 2] = cx * cy
+
+            glUniformMatrix4fv(rot_loc, 1, GL_FALSE, rotation)
 
             glDrawElements(GL_TRIANGLES, num_indices, GL_UNSIGNED_INT, ctypes.c_void_p(0))
 
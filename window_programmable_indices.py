@@ -74,6 +74,8 @@ class Window:
 
         glUseProgram(shader)
 
+        # old.vert takes a model matrix; this demo draws untransformed
+        glUniformMatrix4fv(glGetUniformLocation(shader, 'u_model'), 1, GL_FALSE, np.identity(4, dtype=np.float32))
 
 
     def main_loop(self):
@@ -1,15 +1,17 @@
 import glfw
 from OpenGL.GL import *
-from OpenGL.GL.shaders import compileShader, compileProgram
 import numpy as np
 from math import sin, cos
+from shader_cache import load_program
 import pyrr
 from PIL import Image
 
 class Window:
 
+    # 12B position + 2B normalized UV + 2B pad: a 16B stride instead of 20B
+    VERTEX = np.dtype([('position', np.float32, 3), ('uv', np.uint8, 2), ('pad', np.uint8, 2)])
 
-    vertices = np.array([-0.5, -0.5, 0.5,   0.0, 0.0,
+    _cube = np.array([-0.5, -0.5, 0.5,   0.0, 0.0,
                          0.5, -0.5,  0.5,   1.0, 0.0,
                          0.5,  0.5,  0.5,   1.0, 1.0,
                         -0.5,  0.5,  0.5,   0.0, 1.0,
@@ -38,7 +40,13 @@ class Window:
                         -0.5,  0.5, -0.5,   1.0, 0.0,
                         -0.5,  0.5,  0.5,   1.0, 1.0,
                          0.5,  0.5,  0.5,   0.0, 1.0],
-                            dtype=np.float32)
+                            dtype=np.float32).reshape(-1, 5)
+
+    vertices = np.zeros(len(_cube), dtype=VERTEX)
+    vertices['position'] = _cube[:, :3]
+    vertices['uv'] = _cube[:, 3:] * 255
+    del _cube
+
     indices = np.array([0,  1,  2,      2,  3,  0,
                           4,  5,  6,         6,  7,  4,
                           8,  9, 10,        10, 11,  8,
@@ -66,43 +74,38 @@ class Window:
 
     def window_resize(self, window, width, height):
         glViewport(0, 0, width, height)
-        projection = pyrr.matrix44.create_perspective_projection_matrix(45, width / height, 0.1, 100.0)
-        shader = self.shader_program
-        proj_location = glGetUniformLocation(shader, 'projection')
-        glUniformMatrix4fv(proj_location, 1, GL_FALSE, projection)
-
-    @staticmethod
-    def get_shaders(shader_program_name):
-        with open(f'shaders/{shader_program_name}.vert') as file:
-            vertex_shader = file.read()
-        with open(f'shaders/{shader_program_name}.frag') as file:
-            fragment_shader = file.read()
-
-        return vertex_shader, fragment_shader
+        if not height:
+            return
+        # drag-resizing fires this many times a second; skip unchanged aspects
+        aspect = width / height
+        if abs(self._last_aspect - aspect) < 1e-4:
+            return
+        self._last_aspect = aspect
+        projection = pyrr.matrix44.create_perspective_projection_matrix(45, aspect, 0.1, 100.0)
+        glUniformMatrix4fv(self.proj_location, 1, GL_FALSE, projection)
 
     def draw(self):
         vertices = self.vertices
         indices = self.indices
 
-        vertex_src, fragment_src = self.get_shaders('perspective1')
-
-        shader = compileProgram(compileShader(vertex_src, GL_VERTEX_SHADER), compileShader(fragment_src, GL_FRAGMENT_SHADER))
+        # compiled once, then reloaded from the cached driver binary on later runs
+        shader = load_program('perspective1')
 
         self.shader_program = shader
 
         VBO = glGenBuffers(1)
         glBindBuffer(GL_ARRAY_BUFFER, VBO)
-        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices.view(np.uint8), GL_STATIC_DRAW)
 
         EBO = glGenBuffers(1)
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, EBO)
         glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
 
         glEnableVertexAttribArray(0)
-        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, vertices.itemsize * 5, ctypes.c_void_p(0))
+        glVertexAttribPointer(0, 3, GL_FLOAT, GL_FALSE, vertices.itemsize, ctypes.c_void_p(0))
 
         glEnableVertexAttribArray(1)
-        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, vertices.itemsize * 5, ctypes.c_void_p(12))
+        glVertexAttribPointer(1, 2, GL_UNSIGNED_BYTE, GL_TRUE, vertices.itemsize, ctypes.c_void_p(12))
 
         texture = glGenTextures(1)
         glBindTexture(GL_TEXTURE_2D, texture)
@@ -110,14 +113,17 @@ class Window:
         glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
         glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
 
-        glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+        # trilinear minification: sample the mip level that matches the cube's on-screen size
+        glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
         glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
 
         image = Image.open("textures/trak_light2.jpg")
         image = image.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
 
-        image_data = image.convert('RGBA').tobytes()
+        # numpy view of Pillow's RGBA buffer, uploaded without an intermediate bytes copy
+        image_data = np.ascontiguousarray(np.asarray(image.convert('RGBA'), dtype=np.uint8))
         glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, image.width, image.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, image_data)
+        glGenerateMipmap(GL_TEXTURE_2D)
 
         glUseProgram(shader)
         glClearColor(0, 0.1, 0.1, 1)
@@ -125,18 +131,21 @@ class Window:
         glEnable(GL_BLEND)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
 
-        projection = pyrr.matrix44.create_perspective_projection_matrix(45, 1800/1200, 0.1, 100.0)
-        self.trans = pyrr.matrix44.create_from_translation(pyrr.Vector3([0,0,-3]))
+        self._last_aspect = 1800 / 1200
+        projection = pyrr.matrix44.create_perspective_projection_matrix(45, self._last_aspect, 0.1, 100.0)
+        # rotation @ translation only touches the bottom row, so it is set once here
+        self._model = np.identity(4, dtype=np.float32)
+        self._model[3, :3] = (0, 0, -3)
 
         self.model_location = glGetUniformLocation(shader, 'model')
-        proj_location = glGetUniformLocation(shader, 'projection')
+        self.proj_location = glGetUniformLocation(shader, 'projection')
 
-        glUniformMatrix4fv(proj_location, 1, GL_FALSE, projection)
+        glUniformMatrix4fv(self.proj_location, 1, GL_FALSE, projection)
 
     def main_loop(self):
         num_indices = len(self.indices)
         model_loc = self.model_location
-        translation = self.trans
+        model = self._model
 
         while not glfw.window_should_close(self._win):
 
@@ -144,11 +153,19 @@ class Window:
 
             glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-            rot_x = pyrr.Matrix44.from_x_rotation(0.5 * glfw.get_time())
-            rot_y = pyrr.Matrix44.from_y_rotation(0.8 * glfw.get_time())
-
-            rotation = pyrr.matrix44.multiply(rot_x, rot_y)
-            model = pyrr.matrix44.multiply(rotation, translation)
+            ct = glfw.get_time()
+            cx, sx = cos(0.5 * ct), sin(0.5 * ct)
+            cy, sy = cos(0.8 * ct), sin(0.8 * ct)
+
+            # rot_x(0.5 t) @ rot_y(0.8 t), written straight into the scratch matrix
+            model[0, 0] = cy
+            model[0, 2] = sy
+            model[1, 0] = sx * sy
+            model[1, 1] = cx
+            model[1, 2] = -sx * cy
+            model[2, 0] = -cx * sy
+            model[2, 1] = sx
+            model[2, 2] = cx * cy
 
             glUniformMatrix4fv(model_loc, 1, GL_FALSE, model)
 
@@ -2,7 +2,7 @@ import glfw
 from OpenGL.GL import *
 from OpenGL.GL.shaders import compileShader, compileProgram
 import numpy as np
-from math import sin, cos
+from math import sin, cos, radians
 
 class Window:
 
@@ -63,9 +63,14 @@ class Window:
 
         glUseProgram(shader)
 
+        self._u_model = glGetUniformLocation(shader, 'u_model')
+        # column-major model matrix, refilled in place every frame
+        self._model = np.identity(4, dtype=np.float32)
 
 
     def main_loop(self):
+        u_model = self._u_model
+        model = self._model
         while not glfw.window_should_close(self._win):
 
             glfw.poll_events()
@@ -73,11 +78,20 @@ class Window:
             glClear(GL_COLOR_BUFFER_BIT)
 
             ct = glfw.get_time()
-
-            glLoadIdentity()
-            glScale(abs(sin(ct)), abs(sin(ct)), 1)
-            glRotatef(sin(ct) * 45, 0, 0, 1)
-            glTranslate(sin(ct), cos(ct), 0)
+            s_ct = sin(ct)
+            c_ct = cos(ct)
+
+            # scale(|s|, |s|, 1) * rotate_z(s * 45 deg) * translate(s, c, 0)
+            k = abs(s_ct)
+            angle = radians(s_ct * 45)
+            c, s = cos(angle), sin(angle)
+            model[0, 0] = k * c
+            model[0, 1] = k * s
+            model[1, 0] = -k * s
+            model[1, 1] = k * c
+            model[3, 0] = k * (c * s_ct - s * c_ct)
+            model[3, 1] = k * (s * s_ct + c * c_ct)
+            glUniformMatrix4fv(u_model, 1, GL_FALSE, model)
 
             # glRotatef( abs(sin(ct) * 0.1), 0, 1, 0)
 